@@ -1,12 +1,8 @@
 import pygame
-import math
 import random
 import multiprocessing as mp
-from multiprocessing import Queue
 import serial
 import serial.tools.list_ports
-import base64
-import struct
 import time
 import glob
 import platform
@@ -17,6 +13,13 @@ import queue as qmod
 import json
 import os
 import sys
+import numpy as np
+from frame_engine import EffectRenderer, EFFECTS, DEFAULT_NUM_LIGHTS
+from frame_encoder import FrameEncoder, DeltaEncoder
+from frame_ring import FrameRing
+from clip_cache import Clip, ClipCache
+from rate_controller import RateController, is_frame_ack
+from serial_reader import read_line_batches
 #testing
 def get_available_ports():
     try:
@@ -34,8 +37,13 @@ def save_last_port(port):
     try:
         config_dir = os.path.dirname(os.path.abspath(__file__))
         config_file = os.path.join(config_dir, 'port_config.json')
+        config = {}
+        if os.path.exists(config_file):
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+        config['last_port'] = port
         with open(config_file, 'w') as f:
-            json.dump({'last_port': port}, f)
+            json.dump(config, f)
     except Exception as e:
         print(f"Error saving port config: {e}")
 
@@ -52,10 +60,24 @@ def load_last_port():
         print(f"Error loading port config: {e}")
     return None
 
-def pygame_process(q):
+def load_num_lights():
+    """Load the number of LEDs on the strip from config file"""
+    try:
+        config_dir = os.path.dirname(os.path.abspath(__file__))
+        config_file = os.path.join(config_dir, 'port_config.json')
+        if os.path.exists(config_file):
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+                return int(config.get('num_lights', DEFAULT_NUM_LIGHTS))
+    except Exception as e:
+        print(f"Error loading port config: {e}")
+    return DEFAULT_NUM_LIGHTS
+
+def pygame_process(ring_name, num_lights):
+    ring = FrameRing(num_lights, name=ring_name)
     pygame.init()
     INITIAL_WIDTH, INITIAL_HEIGHT = 1200, 200
-    NUM_LIGHTS = 100
+    NUM_LIGHTS = num_lights
     MIN_LIGHT_SIZE = 10
     SPACING = 2
     CONTROL_HEIGHT = 200
@@ -64,7 +86,7 @@ def pygame_process(q):
     font = pygame.font.SysFont("arial", 14, bold=True)
 
     # Effect settings
-    effects = ["Rainbow Road", "Comet", "Pulse Wave", "Twinkle", "Fire Flicker", "Cars", "Bubbles", "Melting Points", "Fireworks"]
+    effects = EFFECTS
     selected_effect = "Rainbow Road"
     effect_button_rect = pygame.Rect(20, INITIAL_HEIGHT - CONTROL_HEIGHT + 10, 120, 30)
     popup_open = False
@@ -75,7 +97,6 @@ def pygame_process(q):
     comet_color = (255, 0, 0)
     comet_size = 6
     comet_direction = 1
-    comet_head = 0
     pulse_speed = 0.05
     pulse_color = (255, 255, 0)
     twinkle_freq = 0.05
@@ -84,13 +105,9 @@ def pygame_process(q):
     flicker_intensity = 1.0
     cars_num = 4
     cars_colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
-    cars_positions = [0, 25, 50, 75]
-    cars_speeds = [random.uniform(0.05, 0.2) for _ in range(4)]
-    cars_directions = [random.choice([-1, 1]) for _ in range(4)]
     cars_color_index = 0
     bubbles_speed = 0.1
     bubbles_color = (0, 255, 255)
-    bubbles = [(random.randint(0, NUM_LIGHTS-1), random.uniform(0.05, 0.2), random.choice([-1, 1])) for _ in range(5)]
     melt_points = []
     melt_color = random.choice([(100, 0, 0), (100, 0, 100)])
     melt_spacing = 25
@@ -103,8 +120,6 @@ def pygame_process(q):
     fireworks_fade_rate = 0.02
     fireworks_flicker_rate = 5.0
     fireworks_colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)]
-    fireworks_particles = []
-    fireworks_last_launch = 0
     fireworks_color_index = 0
     color_picker_open = False
     slider_open = False
@@ -177,154 +192,9 @@ def pygame_process(q):
 
     update_control_rects(INITIAL_HEIGHT)
 
-    def generate_rainbow_road(lights, t):
-        return [(int(128 + 127 * math.sin(t + i * 0.1)),
-                 int(128 + 127 * math.sin(t + i * 0.1 + 2)),
-                 int(128 + 127 * math.sin(t + i * 0.1 + 4)))
-                for i in range(NUM_LIGHTS)]
-
-    def generate_comet(lights, head, color, size, direction):
-        lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
-        head = int(head) % NUM_LIGHTS
-        for i in range(size):
-            idx = (head - i * direction) % NUM_LIGHTS
-            brightness = max(0, 1 - i / size)
-            lights[idx] = (int(color[0] * brightness),
-                           int(color[1] * brightness),
-                           int(color[2] * brightness))
-        return lights
-
-    def generate_pulse_wave(lights, t, pulse_speed, pulse_color):
-        return [(int(pulse_color[0] * (0.5 + 0.5 * math.sin(t + i * 0.2))),
-                 int(pulse_color[1] * (0.5 + 0.5 * math.sin(t + i * 0.2))),
-                 int(pulse_color[2] * (0.5 + 0.5 * math.sin(t + i * 0.2))))
-                for i in range(NUM_LIGHTS)]
-
-    def generate_twinkle(lights, t, twinkle_freq, twinkle_color):
-        lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
-        for i in range(NUM_LIGHTS):
-            if random.random() < twinkle_freq:
-                brightness = 0.5 + 0.5 * math.sin(t * 5)
-                lights[i] = (int(twinkle_color[0] * brightness),
-                             int(twinkle_color[1] * brightness),
-                             int(twinkle_color[2] * brightness))
-        return lights
-
-    def generate_fire_flicker(lights, t, flicker_speed, flicker_intensity):
-        lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
-        for i in range(NUM_LIGHTS):
-            flicker = 0.5 + 0.5 * math.sin(t * flicker_speed + i * 0.3) * random.uniform(0.5, flicker_intensity)
-            r = min(255, int(255 * flicker))
-            g = min(255, int(100 * flicker))
-            b = min(255, int(50 * flicker))
-            lights[i] = (r, g, b)
-        return lights
-
-    def generate_cars(lights, positions, colors, speeds, directions, num_cars):
-        lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
-        for i in range(min(num_cars, 4)):
-            head = int(positions[i]) % NUM_LIGHTS
-            color = colors[i]
-            lights[head] = (min(255, lights[head][0] + color[0]),
-                            min(255, lights[head][1] + color[1]),
-                            min(255, lights[head][2] + color[2]))
-        return lights
-
-    def generate_bubbles(lights, bubbles, color, speed):
-        lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
-        for pos, _, _ in bubbles:
-            idx = int(pos) % NUM_LIGHTS
-            lights[idx] = (min(255, lights[idx][0] + color[0]),
-                           min(255, lights[idx][1] + color[1]),
-                           min(255, lights[idx][2] + color[2]))
-        return lights
-
-    def generate_melting_points(lights, points, color, spacing, t, melt_speed):
-        lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
-        point_color = (0, 255, 255)
-        for point in points:
-            idx = int(point) % NUM_LIGHTS
-            lights[idx] = point_color
-            for i in range(1, int(spacing) + 1):
-                left_idx = (idx - i) % NUM_LIGHTS
-                right_idx = (idx + i) % NUM_LIGHTS
-                t_offset = math.sin(t * melt_speed + i * 0.2) * 0.3
-                t_interp = min(1, max(0, i / spacing + t_offset))
-                blended_color = (
-                    int(point_color[0] * (1 - t_interp) + color[0] * t_interp),
-                    int(point_color[1] * (1 - t_interp) + color[1] * t_interp),
-                    int(point_color[2] * (1 - t_interp) + color[2] * t_interp)
-                )
-                lights[left_idx] = (
-                    min(255, lights[left_idx][0] + blended_color[0]),
-                    min(255, lights[left_idx][1] + blended_color[1]),
-                    min(255, lights[left_idx][2] + blended_color[2])
-                )
-                lights[right_idx] = (
-                    min(255, lights[right_idx][0] + blended_color[0]),
-                    min(255, lights[right_idx][1] + blended_color[1]),
-                    min(255, lights[right_idx][2] + blended_color[2])
-                )
-        return lights
-
-    def generate_fireworks(lights, t, num_fireworks, explosion_speed, fade_rate, flicker_rate, fireworks_colors, particles, last_launch, fireworks_color_index):
-        lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
-        current_time = t
-
-        # Launch new fireworks
-        if current_time - last_launch > 1.0 / fireworks_launch_freq:
-            launch_pos = random.randint(20, NUM_LIGHTS - 20)
-            bang_color = (255, 165, 0)  # Bright orange
-            lights[launch_pos] = bang_color
-            # Create particles spreading outwards, all same color
-            particle_color = fireworks_colors[random.randint(0, len(fireworks_colors) - 1)]
-            num_particles_left = random.randint(5, 10)
-            num_particles_right = random.randint(5, 10)
-            for _ in range(num_particles_left):
-                particles.append({
-                    'pos': launch_pos,
-                    'dist': 0,
-                    'direction': -1,
-                    'color': particle_color,
-                    'brightness': 1.0,
-                    'speed': random.uniform(1.0, explosion_speed)
-                })
-            for _ in range(num_particles_right):
-                particles.append({
-                    'pos': launch_pos,
-                    'dist': 0,
-                    'direction': 1,
-                    'color': particle_color,
-                    'brightness': 1.0,
-                    'speed': random.uniform(1.0, explosion_speed)
-                })
-            last_launch = current_time
-            if len(particles) > num_fireworks * 20:  # Limit total particles
-                particles = particles[-num_fireworks * 20:]
-
-        # Update particles
-        new_particles = []
-        for p in particles:
-            p['dist'] += p['speed']
-            p['brightness'] -= fade_rate * (p['dist'] / 10)  # Dimmer as farther
-            if p['brightness'] > 0:
-                idx = int(p['pos'] + p['dist'] * p['direction']) % NUM_LIGHTS
-                flicker = 0.5 + 0.5 * math.sin(current_time * flicker_rate + idx)
-                col_r = int(p['color'][0] * p['brightness'] * flicker)
-                col_g = int(p['color'][1] * p['brightness'] * flicker)
-                col_b = int(p['color'][2] * p['brightness'] * flicker)
-                lights[idx] = (min(255, lights[idx][0] + col_r),
-                               min(255, lights[idx][1] + col_g),
-                               min(255, lights[idx][2] + col_b))
-                new_particles.append(p)
-
-        particles[:] = new_particles
-
-        return lights, particles, last_launch, fireworks_color_index
-
-    lights = [(0, 0, 0) for _ in range(NUM_LIGHTS)]
+    renderer = EffectRenderer(NUM_LIGHTS, clip_cache=ClipCache())
+    lights = renderer.engine.blank()
     running = True
-    t = 0
     clock = pygame.time.Clock()
     FPS = 60
     delta_time = 1.0 / FPS
@@ -360,7 +230,7 @@ def pygame_process(q):
                                 if effect == "Melting Points":
                                     melt_points.clear()
                                 if effect == "Fireworks":
-                                    fireworks_particles.clear()
+                                    renderer.reset_fireworks()
                     elif selected_effect == "Melting Points" and melt_point_selection and event.pos[1] < screen.get_height() - CONTROL_HEIGHT:
                         light_width = max(MIN_LIGHT_SIZE, (screen.get_width() - (NUM_LIGHTS - 1) * SPACING) // NUM_LIGHTS)
                         idx = min(NUM_LIGHTS - 1, max(0, event.pos[0] // (light_width + SPACING)))
@@ -528,49 +398,39 @@ def pygame_process(q):
                             elif slider_type == "fireworks_flicker":
                                 fireworks_flicker_rate = 1.0 + slider_pos * (10.0 - 1.0)
 
-            if selected_effect == "Rainbow Road":
-                lights = generate_rainbow_road(lights, t)
-                t += rainbow_speed * delta_time
-            elif selected_effect == "Comet":
-                lights = generate_comet(lights, comet_head, comet_color, comet_size, comet_direction)
-                comet_head += (comet_speed * delta_time) * comet_direction
-            elif selected_effect == "Pulse Wave":
-                lights = generate_pulse_wave(lights, t, pulse_speed, pulse_color)
-                t += pulse_speed * delta_time
-            elif selected_effect == "Twinkle":
-                lights = generate_twinkle(lights, t, twinkle_freq, twinkle_color)
-                t += 0.05 * delta_time
-            elif selected_effect == "Fire Flicker":
-                lights = generate_fire_flicker(lights, t, flicker_speed, flicker_intensity)
-                t += 0.05 * delta_time
-            elif selected_effect == "Cars":
-                lights = generate_cars(lights, cars_positions, cars_colors, cars_speeds, cars_directions, cars_num)
-                for i in range(4):
-                    cars_positions[i] += cars_speeds[i] * cars_directions[i] * delta_time * 60  # Adjust for per second
-                    if cars_positions[i] < 0 or cars_positions[i] >= NUM_LIGHTS:
-                        cars_directions[i] *= -1
-                        cars_positions[i] = max(0, min(NUM_LIGHTS - 1, cars_positions[i]))
-            elif selected_effect == "Bubbles":
-                lights = generate_bubbles(lights, bubbles, bubbles_color, bubbles_speed)
-                for i, (pos, speed, direction) in enumerate(bubbles):
-                    pos += speed * direction * delta_time * 60  # Adjust for per second
-                    if pos < 0 or pos >= NUM_LIGHTS:
-                        direction *= -1
-                        pos = max(0, min(NUM_LIGHTS - 1, pos))
-                    bubbles[i] = (pos, speed, direction)
-            elif selected_effect == "Melting Points":
-                lights = generate_melting_points(lights, melt_points, melt_color, melt_spacing, t, melt_speed)
-                t += delta_time
-            elif selected_effect == "Fireworks":
-                lights, fireworks_particles, fireworks_last_launch, fireworks_color_index = generate_fireworks(lights, t, fireworks_num, fireworks_explosion_speed, fireworks_fade_rate, fireworks_flicker_rate, fireworks_colors, fireworks_particles, fireworks_last_launch, fireworks_color_index)
-                t += delta_time
-
-            q.put(lights)
+            lights = renderer.step(selected_effect, {
+                "rainbow_speed": rainbow_speed,
+                "comet_speed": comet_speed,
+                "comet_color": comet_color,
+                "comet_size": comet_size,
+                "comet_direction": comet_direction,
+                "pulse_speed": pulse_speed,
+                "pulse_color": pulse_color,
+                "twinkle_freq": twinkle_freq,
+                "twinkle_color": twinkle_color,
+                "flicker_speed": flicker_speed,
+                "flicker_intensity": flicker_intensity,
+                "cars_num": cars_num,
+                "cars_colors": cars_colors,
+                "bubbles_color": bubbles_color,
+                "melt_points": melt_points,
+                "melt_color": melt_color,
+                "melt_spacing": melt_spacing,
+                "melt_speed": melt_speed,
+                "fireworks_num": fireworks_num,
+                "fireworks_launch_freq": fireworks_launch_freq,
+                "fireworks_explosion_speed": fireworks_explosion_speed,
+                "fireworks_fade_rate": fireworks_fade_rate,
+                "fireworks_flicker_rate": fireworks_flicker_rate,
+                "fireworks_colors": fireworks_colors,
+            }, delta_time)
+
+            ring.write(lights, renderer.clip_tag)
 
             light_width = max(MIN_LIGHT_SIZE, (screen.get_width() - (NUM_LIGHTS - 1) * SPACING) // NUM_LIGHTS)
             light_height = max(MIN_LIGHT_SIZE, screen.get_height() - CONTROL_HEIGHT - SPACING)
             screen.fill((10, 10, 10))
-            for i, color in enumerate(lights):
+            for i, color in enumerate(lights.tolist()):
                 x = i * (light_width + SPACING)
                 pygame.draw.rect(screen, color, (x, 0, light_width, light_height))
                 if selected_effect == "Melting Points" and i in melt_points:
@@ -788,11 +648,13 @@ def pygame_process(q):
             print(f"Pygame error: {e}")
             running = False
 
-    q.put(None)
+    ring.finish()
+    ring.close()
     pygame.quit()
     sys.exit(0)  # Ensure process exits
 
-def tkinter_process(q):
+def tkinter_process(ring_name, num_lights):
+    ring = FrameRing(num_lights, name=ring_name)
     root = tk.Tk()
     root.title("Serial Control")
     root.geometry("400x300")
@@ -828,6 +690,12 @@ def tkinter_process(q):
     refresh_entry.pack(pady=5)
     apply_btn = tk.Button(root, text="Apply", state=tk.DISABLED)
     apply_btn.pack(pady=5)
+    auto_var = tk.BooleanVar(value=False)
+    auto_check = tk.Checkbutton(root, text="Auto rate (fastest the link sustains)", variable=auto_var, state=tk.DISABLED)
+    auto_check.pack(pady=5)
+    delta_var = tk.BooleanVar(value=False)
+    delta_check = tk.Checkbutton(root, text="Delta frames (send changed LEDs only)", variable=delta_var, state=tk.DISABLED)
+    delta_check.pack(pady=5)
 
     tk.Label(root, text="Terminal:").pack(pady=5)
     term = scrolledtext.ScrolledText(root, height=10, width=50, state=tk.DISABLED)
@@ -851,6 +719,9 @@ def tkinter_process(q):
     sender_thread = None
     test_thread = None
     send_interval = 0.2
+    auto_rate = False
+    delta_mode = False
+    rate = None
 
     def update_terminal():
         try:
@@ -873,8 +744,20 @@ def tkinter_process(q):
         except ValueError:
             term_queue.put("Invalid rate")
 
+    def toggle_auto_rate():
+        nonlocal auto_rate
+        auto_rate = auto_var.get()
+        refresh_entry.config(state=tk.DISABLED if auto_rate else tk.NORMAL)
+        apply_btn.config(state=tk.DISABLED if auto_rate else tk.NORMAL)
+        term_queue.put("Auto refresh rate on" if auto_rate else "Auto refresh rate off")
+
+    def toggle_delta_mode():
+        nonlocal delta_mode
+        delta_mode = delta_var.get()
+        term_queue.put("Delta frames on" if delta_mode else "Delta frames off")
+
     def connect():
-        nonlocal ser, connected, reader_thread
+        nonlocal ser, connected, reader_thread, rate
         port = port_var.get()
         baud = baud_var.get()
         if not port:
@@ -882,14 +765,17 @@ def tkinter_process(q):
             return
         try:
             ser = serial.Serial(port, baud, timeout=0.1)
+            rate = RateController(baud)
             connected = True
             # Save the port for next time
             save_last_port(port)
             connect_btn.config(text="Disconnect", state=tk.NORMAL)
             port_combo.config(state=tk.DISABLED)
             baud_combo.config(state=tk.DISABLED)
-            refresh_entry.config(state=tk.NORMAL)
-            apply_btn.config(state=tk.NORMAL)
+            refresh_entry.config(state=tk.DISABLED if auto_rate else tk.NORMAL)
+            apply_btn.config(state=tk.DISABLED if auto_rate else tk.NORMAL)
+            auto_check.config(state=tk.NORMAL)
+            delta_check.config(state=tk.NORMAL)
             play_btn.config(state=tk.NORMAL)
             stop_btn.config(state=tk.DISABLED)
             test_btn.config(state=tk.NORMAL)
@@ -917,6 +803,8 @@ def tkinter_process(q):
         baud_combo.config(state=tk.NORMAL)
         refresh_entry.config(state=tk.DISABLED)
         apply_btn.config(state=tk.DISABLED)
+        auto_check.config(state=tk.DISABLED)
+        delta_check.config(state=tk.DISABLED)
         play_btn.config(state=tk.DISABLED)
         stop_btn.config(state=tk.DISABLED)
         test_btn.config(state=tk.DISABLED)
@@ -924,16 +812,15 @@ def tkinter_process(q):
         term_queue.put("Disconnected")
 
     def reader_loop():
-        while connected:
-            try:
-                if ser.in_waiting:
-                    line = ser.readline().decode('utf-8', errors='ignore').strip()
-                    if line:
-                        term_queue.put(f"<< {line}")
-                time.sleep(0.01)
-            except Exception as e:
-                term_queue.put(f"Read error: {e}")
-                break
+        try:
+            for lines in read_line_batches(ser, lambda: connected):
+                now = time.time()
+                for line in lines:
+                    if is_frame_ack(line):
+                        rate.record_ack(now)
+                    term_queue.put(f"<< {line}")
+        except Exception as e:
+            term_queue.put(f"Read error: {e}")
 
     def start_sending():
         nonlocal sending, sender_thread
@@ -942,7 +829,7 @@ def tkinter_process(q):
             play_btn.config(state=tk.DISABLED)
             stop_btn.config(state=tk.NORMAL)
             term_queue.put("Starting sending...")
-            sender_thread = threading.Thread(target=sender_loop, args=(q,), daemon=True)
+            sender_thread = threading.Thread(target=sender_loop, daemon=True)
             sender_thread.start()
 
     def stop_sending():
@@ -952,36 +839,66 @@ def tkinter_process(q):
         stop_btn.config(state=tk.DISABLED)
         term_queue.put("Stopped sending")
 
-    def sender_loop(lights_q):
+    def encode_frame(encoder, payload_cache, lights, tag):
+        """Encode a frame, reusing the cached command when the frame came from a cached clip"""
+        key, index, length = tag
+        if not key:
+            return encoder.encode(lights)
+        clip = payload_cache.get(key)
+        if clip is None or clip.length != length:
+            clip = Clip(key, length)
+            payload_cache.put(key, clip, 0)
+        command = clip.payloads[index]
+        if command is None:
+            command = bytes(encoder.encode(lights))
+            clip.payloads[index] = command
+            payload_cache.grow(key, len(command))
+        return command
+
+    def sender_loop():
+        encoder = FrameEncoder(ring.num_lights)
+        payload_cache = ClipCache()
+        delta = DeltaEncoder(ring.num_lights)
+        lights = np.zeros((ring.num_lights, 3), dtype=np.uint8)
+        last_seq = 0
         last_send = time.time() - 1
+        last_report = time.time()
         while sending:
-            if time.time() - last_send > send_interval:
-                lights = None
-                # Drain queue to get latest frame
-                while True:
-                    try:
-                        lights = lights_q.get_nowait()
-                        if lights is None:
-                            return
-                    except:
-                        break
-                if lights is not None:
+            if ring.closed:
+                return
+            interval = rate.interval if auto_rate else send_interval
+            if time.time() - last_send > interval:
+                # Copy out the newest frame, skipping any the renderer produced in between. write() + flush()
+                # block until the port has drained, so frames never queue behind unsent bytes
+                seq = ring.read_latest(lights, last_seq)
+                if seq is not None:
+                    skipped = seq - last_seq - 1 if last_seq else 0
+                    last_seq = seq
                     try:
-                        packed = b''
-                        for r, g, b in lights:
-                            r16 = int(r / 255 * 65535)
-                            g16 = int(g / 255 * 65535)
-                            b16 = int(b / 255 * 65535)
-                            packed += struct.pack('>HHH', r16, g16, b16)
-                        colors_b64 = base64.b64encode(packed).decode()
-                        command = f'<LIGHTING.PUT0({{"colors_b64":"{colors_b64}"}})>'
-                        ser.write(command.encode())
+                        if delta_mode:
+                            command = delta.encode(lights)
+                            if command is None:
+                                last_send = time.time()
+                                continue
+                        else:
+                            # Start with a keyframe whenever delta mode is turned on
+                            delta.force_keyframe()
+                            command = encode_frame(encoder, payload_cache, lights, ring.last_tag)
+                        start = time.perf_counter()
+                        ser.write(command)
                         ser.flush()
-                        term_queue.put(f">> Sent frame ({len(lights)} LEDs)")
                         last_send = time.time()
+                        rate.record_write(len(command), time.perf_counter() - start, last_send, skipped)
+                        term_queue.put(f">> Sent frame {seq} ({len(lights)} LEDs, {len(command)} bytes, {skipped} skipped)")
                     except Exception as e:
+                        # The device may have missed part of a patch, resync with a full frame
+                        delta.force_keyframe()
                         term_queue.put(f"Send error: {e}")
-            time.sleep(0.01)
+            if auto_rate and time.time() - last_report > 2:
+                term_queue.put(rate.summary())
+                last_report = time.time()
+            # Sleep until the next frame is due instead of polling
+            time.sleep(min(0.01, max(0.001, last_send + interval - time.time())))
 
     def start_test():
         nonlocal test_sending, test_thread
@@ -1005,26 +922,20 @@ def tkinter_process(q):
             stop_test()
 
     def test_loop():
+        encoder = FrameEncoder(num_lights)
         color_patterns = [
-            [(255, 0, 0)] * 100,  # All red
-            [(0, 0, 255)] * 100,  # All blue
-            [(0, 255, 0)] * 100   # All green
+            np.tile(np.array([255, 0, 0], dtype=np.uint8), (num_lights, 1)),  # All red
+            np.tile(np.array([0, 0, 255], dtype=np.uint8), (num_lights, 1)),  # All blue
+            np.tile(np.array([0, 255, 0], dtype=np.uint8), (num_lights, 1))   # All green
         ]
         i = 0
         while test_sending:
             light_colors = color_patterns[i % 3]
-            packed = b''
-            for r, g, b in light_colors:
-                r16 = int(r / 255 * 65535)
-                g16 = int(g / 255 * 65535)
-                b16 = int(b / 255 * 65535)
-                packed += struct.pack('>HHH', r16, g16, b16)
-            colors_b64 = base64.b64encode(packed).decode()
-            command = f'<LIGHTING.PUT0({{"colors_b64":"{colors_b64}"}})>'
+            command = encoder.encode(light_colors)
             try:
-                ser.write(command.encode())
+                ser.write(command)
                 ser.flush()
-                term_queue.put(f">> {command}")
+                term_queue.put(f">> {command.decode()}")
                 term_queue.put("Sent test color")
             except Exception as e:
                 term_queue.put(f"Test send error: {e}")
@@ -1040,6 +951,8 @@ def tkinter_process(q):
 
     connect_btn.config(command=toggle_connect)
     apply_btn.config(command=apply_refresh)
+    auto_check.config(command=toggle_auto_rate)
+    delta_check.config(command=toggle_delta_mode)
     play_btn.config(command=start_sending)
     stop_btn.config(command=stop_sending)
     test_btn.config(command=toggle_test)
@@ -1048,6 +961,7 @@ def tkinter_process(q):
         stop_sending()
         stop_test()
         disconnect()
+        ring.close()
         root.quit()
         root.destroy()
         sys.exit(0)  # Force exit the tkinter process
@@ -1058,9 +972,10 @@ def tkinter_process(q):
     sys.exit(0)  # Ensure process exits after mainloop ends
 
 if __name__ == '__main__':
-    q = Queue()
-    p1 = mp.Process(target=pygame_process, args=(q,))
-    p2 = mp.Process(target=tkinter_process, args=(q,))
+    num_lights = load_num_lights()
+    ring = FrameRing(num_lights)
+    p1 = mp.Process(target=pygame_process, args=(ring.name, num_lights))
+    p2 = mp.Process(target=tkinter_process, args=(ring.name, num_lights))
     
     # Set daemon to True so processes die when main exits
     p1.daemon = True
@@ -1088,5 +1003,6 @@ if __name__ == '__main__':
             p2.join(timeout=1)
             if p2.is_alive():
                 p2.kill()  # Force kill if terminate doesn't work
+        ring.close()
         print("All processes terminated. Exiting.")
         sys.exit(0)
\ No newline at end of file
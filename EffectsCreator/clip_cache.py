@@ -0,0 +1,105 @@
+from collections import OrderedDict
+import hashlib
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def clip_id(key):
+    """Stable 64-bit id for a clip key, the same in every process (unlike hash())"""
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') or 1  # 0 means "not from a clip"
+
+
+class Clip:
+    """One period of an effect, filled in lazily as each frame index is first visited
+
+    The renderer keeps rendered frames in it and the serial sender keeps the
+    encoded LIGHTING.PUT0 commands, so after one full period both are lookups.
+    """
+
+    def __init__(self, key_id, length, frame_shape=None):
+        self.id = key_id
+        self.length = length
+        self.frames = np.empty((length,) + tuple(frame_shape), dtype=np.uint8) if frame_shape else None
+        self.filled = np.zeros(length, dtype=bool)
+        self.payloads = [None] * length
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes if self.frames is not None else 0
+
+
+class ClipCache:
+    """Bounded LRU of cached clips with byte-size accounting
+
+    Values are opaque; callers report how many bytes each one holds with put()
+    and grow(). The least recently used clips are evicted once the total
+    would go over max_bytes, and a single clip larger than the budget is never stored.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._clips = OrderedDict()  # key -> [value, nbytes]
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._clips)
+
+    def __contains__(self, key):
+        return key in self._clips
+
+    def get(self, key):
+        """Return the cached value and mark it most recently used, or None"""
+        entry = self._clips.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._clips.move_to_end(key)
+        return entry[0]
+
+    def fits(self, nbytes):
+        return nbytes <= self.max_bytes
+
+    def put(self, key, value, nbytes):
+        """Store a value, evicting older clips as needed; returns False if it can never fit"""
+        if not self.fits(nbytes):
+            return False
+        self.discard(key)
+        self._evict(self.max_bytes - nbytes)
+        self._clips[key] = [value, nbytes]
+        self.bytes_used += nbytes
+        return True
+
+    def grow(self, key, nbytes):
+        """Account for bytes added to an existing clip, e.g. a newly encoded payload"""
+        entry = self._clips.get(key)
+        if entry is None:
+            return
+        if not self.fits(entry[1] + nbytes):
+            self.discard(key)
+            return
+        self._clips.move_to_end(key)
+        entry[1] += nbytes
+        self.bytes_used += nbytes
+        self._evict(self.max_bytes, keep=key)
+
+    def discard(self, key):
+        entry = self._clips.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry[1]
+
+    def clear(self):
+        self._clips.clear()
+        self.bytes_used = 0
+
+    def _evict(self, budget, keep=None):
+        """Drop least recently used clips until bytes_used <= budget"""
+        for key in list(self._clips):
+            if self.bytes_used <= budget:
+                break
+            if key != keep:
+                self.discard(key)
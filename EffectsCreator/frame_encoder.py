@@ -0,0 +1,147 @@
+import base64
+import numpy as np
+
+COMMAND_PREFIX = b'<LIGHTING.PUT0({"colors_b64":"'
+COMMAND_SUFFIX = b'"})>'
+
+B64_ALPHABET = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/', dtype=np.uint8)
+
+
+class FrameEncoder:
+    """Encode (N, 3) frames into LIGHTING.PUT0 commands using preallocated buffers
+
+    8-bit frames are scaled to 16-bit big-endian (x * 257, same as x / 255 * 65535)
+    and uint16 frames are sent as-is. The returned command is a view of a buffer
+    that is reused on the next call, so write or copy it before encoding again.
+    """
+
+    def __init__(self, num_lights):
+        self._allocate(num_lights)
+
+    def _allocate(self, num_lights):
+        self.num_lights = int(num_lights)
+        # 6 bytes per LED is always a multiple of 3, so the base64 output never needs padding
+        self.words = np.empty((self.num_lights, 3), dtype='>u2')
+        self.raw = self.words.view(np.uint8).reshape(-1, 3)
+        groups = self.raw.shape[0]
+        self.b64_len = groups * 4
+        self.sextets = np.empty((groups, 4), dtype=np.uint8)
+        self.scratch = np.empty(groups, dtype=np.uint8)
+        self.command = bytearray(len(COMMAND_PREFIX) + self.b64_len + len(COMMAND_SUFFIX))
+        self.command[:len(COMMAND_PREFIX)] = COMMAND_PREFIX
+        self.command[len(self.command) - len(COMMAND_SUFFIX):] = COMMAND_SUFFIX
+        start = len(COMMAND_PREFIX)
+        self.b64_out = np.frombuffer(self.command, dtype=np.uint8)[start:start + self.b64_len].reshape(-1, 4)
+        self.b64_view = memoryview(self.command)[start:start + self.b64_len]
+
+    def _pack(self, frame):
+        """Scale the frame into the big-endian 16-bit word buffer"""
+        frame = np.asarray(frame)
+        if frame.shape[0] != self.num_lights:
+            self._allocate(frame.shape[0])
+        if frame.dtype == np.uint16:
+            self.words[:] = frame
+        else:
+            np.multiply(frame, 257, out=self.words, dtype=np.uint16, casting='unsafe')
+
+    def _b64encode(self):
+        """Base64-encode the packed words straight into the command buffer"""
+        a, b, c = self.raw[:, 0], self.raw[:, 1], self.raw[:, 2]
+        out, tmp = self.sextets, self.scratch
+        np.right_shift(a, 2, out=out[:, 0])
+        np.bitwise_and(a, 0x03, out=tmp)
+        np.left_shift(tmp, 4, out=tmp)
+        np.right_shift(b, 4, out=out[:, 1])
+        np.bitwise_or(out[:, 1], tmp, out=out[:, 1])
+        np.bitwise_and(b, 0x0F, out=tmp)
+        np.left_shift(tmp, 2, out=tmp)
+        np.right_shift(c, 6, out=out[:, 2])
+        np.bitwise_or(out[:, 2], tmp, out=out[:, 2])
+        np.bitwise_and(c, 0x3F, out=out[:, 3])
+        np.take(B64_ALPHABET, out, out=self.b64_out)
+
+    def encode_b64(self, frame):
+        """Return the colors_b64 payload for a frame as a reused memoryview"""
+        self._pack(frame)
+        self._b64encode()
+        return self.b64_view
+
+    def encode(self, frame):
+        """Return the full LIGHTING.PUT0 command for a frame as a reused bytearray"""
+        self.encode_b64(frame)
+        return self.command
+
+
+PATCH_PREFIX = b'<LIGHTING.PATCH0('
+PATCH_SUFFIX = b')>'
+DEFAULT_KEYFRAME_INTERVAL = 60
+
+
+class DeltaEncoder:
+    """Encode only the LEDs of an 8-bit frame that changed since the last transmitted one
+
+    Changed LEDs are grouped into index ranges (gaps of up to merge_gap unchanged
+    LEDs are folded into a range since a new range costs more than a few colors):
+
+        <LIGHTING.PATCH0({"ranges":[[start,count],...],"colors_b64":"..."})>
+
+    colors_b64 holds the 16-bit colors of every range back to back, in the same
+    format as LIGHTING.PUT0. A full PUT0 keyframe goes out first, every
+    keyframe_interval frames, after force_keyframe() and whenever the patch
+    would not be smaller than a full frame.
+    """
+
+    def __init__(self, num_lights, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL, merge_gap=4):
+        self.full = FrameEncoder(num_lights)
+        self.keyframe_interval = keyframe_interval
+        self.merge_gap = merge_gap
+        self.last = None
+        self.since_keyframe = 0
+        self.keyframes = 0
+        self.patches = 0
+
+    def force_keyframe(self):
+        """Send a full frame next, e.g. after a write error or reconnect"""
+        self.last = None
+
+    def _keyframe(self, frame):
+        self.last = np.array(frame, dtype=np.uint8, copy=True)
+        self.since_keyframe = 0
+        self.keyframes += 1
+        return bytes(self.full.encode(frame))
+
+    def encode(self, frame):
+        """Return the command bytes to send for this frame, or None if nothing changed"""
+        frame = np.asarray(frame)
+        if (self.last is None or self.last.shape != frame.shape
+                or self.since_keyframe + 1 >= self.keyframe_interval):
+            return self._keyframe(frame)
+
+        changed = np.flatnonzero(np.any(frame != self.last, axis=1))
+        if changed.size == 0:
+            return None
+
+        # Split the changed indices into ranges wherever the gap is too large to bridge
+        breaks = np.flatnonzero(np.diff(changed) > self.merge_gap + 1)
+        starts = changed[np.r_[0, breaks + 1]]
+        ends = changed[np.r_[breaks, changed.size - 1]] + 1
+        counts = ends - starts
+        total = int(counts.sum())
+        # 8 base64 characters per LED plus roughly 12 characters per range entry
+        if 8 * total + 12 * starts.size >= self.full.b64_len:
+            return self._keyframe(frame)
+
+        # Indices of every LED in every range, without a Python loop over ranges
+        run_offsets = np.cumsum(counts) - counts
+        selected = np.repeat(starts - run_offsets, counts) + np.arange(total)
+
+        colors = np.empty((total, 3), dtype='>u2')
+        np.multiply(frame[selected], 257, out=colors, dtype=np.uint16, casting='unsafe')
+        colors_b64 = base64.b64encode(colors.tobytes())
+        ranges = ','.join(f'[{s},{c}]' for s, c in zip(starts.tolist(), counts.tolist()))
+
+        self.last[selected] = frame[selected]
+        self.since_keyframe += 1
+        self.patches += 1
+        return b''.join((PATCH_PREFIX, b'{"ranges":[', ranges.encode(), b'],"colors_b64":"',
+                         colors_b64, b'"}', PATCH_SUFFIX))
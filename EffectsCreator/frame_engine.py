@@ -0,0 +1,410 @@
+import math
+import numpy as np
+from clip_cache import Clip, clip_id
+
+DEFAULT_NUM_LIGHTS = 100
+
+TWO_PI = 2 * math.pi
+NO_CLIP_TAG = (0, 0, 0)
+MIN_CLIP_FRAMES = 16
+MAX_CLIP_FRAMES = 512  # Slower effects sample their period at this resolution instead of one frame per step
+
+# Colors shared by the effects
+MELT_POINT_COLOR = np.array([0, 255, 255], dtype=np.int32)
+FIREWORK_BANG_COLOR = (255, 165, 0)  # Bright orange
+
+
+class FrameEngine:
+    """Vectorized frame generator producing (N, 3) uint8 frames for a strip of N lights"""
+
+    def __init__(self, num_lights=DEFAULT_NUM_LIGHTS, rng=None):
+        self.num_lights = int(num_lights)
+        self.rng = rng if rng is not None else np.random.default_rng()
+        # Preallocated work buffers, reused every frame
+        self.index = np.arange(self.num_lights, dtype=np.float64)
+        self.phase = np.empty(self.num_lights, dtype=np.float64)
+        self.accum = np.zeros((self.num_lights, 3), dtype=np.int32)
+        self.frame = np.zeros((self.num_lights, 3), dtype=np.uint8)
+
+    def blank(self):
+        """Return an all-off frame"""
+        self.frame.fill(0)
+        return self.frame
+
+    def _finish(self):
+        """Saturate the accumulator into the output frame"""
+        np.clip(self.accum, 0, 255, out=self.accum)
+        self.frame[:] = self.accum
+        return self.frame
+
+    def rainbow_road(self, t):
+        np.multiply(self.index, 0.1, out=self.phase)
+        self.phase += t
+        for channel, offset in enumerate((0, 2, 4)):
+            self.frame[:, channel] = 128 + 127 * np.sin(self.phase + offset)
+        return self.frame
+
+    def comet(self, head, color, size, direction):
+        self.accum.fill(0)
+        head = int(head) % self.num_lights
+        steps = np.arange(size)
+        idx = (head - steps * direction) % self.num_lights
+        brightness = np.maximum(0, 1 - steps / size)
+        self.accum[idx] = (np.asarray(color) * brightness[:, None]).astype(np.int32)
+        return self._finish()
+
+    def pulse_wave(self, t, pulse_color):
+        np.multiply(self.index, 0.2, out=self.phase)
+        self.phase += t
+        level = 0.5 + 0.5 * np.sin(self.phase)
+        self.frame[:] = np.asarray(pulse_color) * level[:, None]
+        return self.frame
+
+    def twinkle(self, t, twinkle_freq, twinkle_color):
+        self.frame.fill(0)
+        lit = self.rng.random(self.num_lights) < twinkle_freq
+        brightness = 0.5 + 0.5 * np.sin(t * 5)
+        self.frame[lit] = np.asarray(twinkle_color) * brightness
+        return self.frame
+
+    def fire_flicker(self, t, flicker_speed, flicker_intensity):
+        np.multiply(self.index, 0.3, out=self.phase)
+        self.phase += t * flicker_speed
+        jitter = self.rng.uniform(0.5, flicker_intensity, self.num_lights)
+        flicker = 0.5 + 0.5 * np.sin(self.phase) * jitter
+        self.accum[:] = np.multiply.outer(flicker, (255, 100, 50))
+        return self._finish()
+
+    def cars(self, positions, colors, num_cars):
+        self.accum.fill(0)
+        count = min(num_cars, 4)
+        idx = np.asarray(positions[:count], dtype=np.int64) % self.num_lights
+        np.add.at(self.accum, idx, np.asarray(colors[:count], dtype=np.int32))
+        return self._finish()
+
+    def bubbles(self, positions, color):
+        self.accum.fill(0)
+        idx = np.asarray(positions, dtype=np.int64) % self.num_lights
+        np.add.at(self.accum, idx, np.asarray(color, dtype=np.int32))
+        return self._finish()
+
+    def melting_points(self, points, color, spacing, t, melt_speed):
+        self.accum.fill(0)
+        steps = np.arange(1, int(spacing) + 1)
+        t_offset = np.sin(t * melt_speed + steps * 0.2) * 0.3
+        t_interp = np.clip(steps / spacing + t_offset, 0, 1)[:, None]
+        blended = (MELT_POINT_COLOR * (1 - t_interp) + np.asarray(color) * t_interp).astype(np.int32)
+        # Points are applied in order: each one resets its own light before spreading
+        for point in points:
+            idx = int(point) % self.num_lights
+            self.accum[idx] = MELT_POINT_COLOR
+            np.add.at(self.accum, (idx - steps) % self.num_lights, blended)
+            np.add.at(self.accum, (idx + steps) % self.num_lights, blended)
+        return self._finish()
+
+    def fireworks(self, t, launch_freq, num_fireworks, explosion_speed, fade_rate, flicker_rate, fireworks_colors, particles, last_launch):
+        self.accum.fill(0)
+        n = self.num_lights
+
+        # Launch new fireworks
+        if t - last_launch > 1.0 / launch_freq:
+            launch_pos = int(self.rng.integers(min(20, n // 2), max(n - 20, n // 2) + 1))
+            self.accum[launch_pos] = FIREWORK_BANG_COLOR
+            # Create particles spreading outwards, all same color
+            particle_color = fireworks_colors[int(self.rng.integers(len(fireworks_colors)))]
+            for direction in (-1, 1):
+                count = int(self.rng.integers(5, 11))
+                particles.spawn(launch_pos, direction, particle_color, self.rng.uniform(1.0, explosion_speed, count))
+            last_launch = t
+            particles.keep_newest(num_fireworks * 20)  # Limit total particles
+
+        # Update particles, dropping the ones that faded out
+        particles.update(fade_rate)
+
+        count = particles.count
+        if count:
+            idx = (particles.pos[:count] + particles.dist[:count] * particles.direction[:count]).astype(np.int64) % n
+            flicker = 0.5 + 0.5 * np.sin(t * flicker_rate + idx)
+            level = particles.brightness[:count] * flicker
+            np.add.at(self.accum, idx, (particles.color[:count] * level[:, None]).astype(np.int32))
+
+        return self._finish(), last_launch
+
+
+class ParticlePool:
+    """Struct-of-arrays particle storage with preallocated capacity, oldest particles first"""
+
+    FIELDS = ("pos", "dist", "direction", "speed", "brightness", "color")
+
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.capacity = 0
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, capacity):
+        """Reallocate every field with room for capacity particles, keeping the live ones"""
+        for name in self.FIELDS:
+            shape = (capacity, 3) if name == "color" else (capacity,)
+            array = np.zeros(shape, dtype=np.float64)
+            if self.capacity:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, pos, direction, color, speeds):
+        """Add one particle per speed, all starting at pos and moving the same way"""
+        added = len(speeds)
+        end = self.count + added
+        if end > self.capacity:
+            self._grow(max(end, 2 * self.capacity))
+        new = slice(self.count, end)
+        self.pos[new] = pos
+        self.dist[new] = 0
+        self.direction[new] = direction
+        self.speed[new] = speeds
+        self.brightness[new] = 1.0
+        self.color[new] = color
+        self.count = end
+
+    def keep_newest(self, limit):
+        """Drop the oldest particles beyond limit"""
+        if self.count <= limit:
+            return
+        first = self.count - limit
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:limit] = array[first:self.count]
+        self.count = limit
+
+    def update(self, fade_rate):
+        """Move every particle outwards and fade it, dimmer the farther it has travelled"""
+        live = slice(0, self.count)
+        self.dist[live] += self.speed[live]
+        self.brightness[live] -= fade_rate * (self.dist[live] / 10)
+        alive = self.brightness[live] > 0
+        kept = int(alive.sum())
+        if kept == self.count:
+            return
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:kept] = array[live][alive]
+        self.count = kept
+
+
+EFFECTS = ["Rainbow Road", "Comet", "Pulse Wave", "Twinkle", "Fire Flicker", "Cars", "Bubbles", "Melting Points", "Fireworks"]
+
+# Parameter defaults, matching the initial values of the EffectsCreator controls
+DEFAULT_PARAMS = {
+    "rainbow_speed": 0.05,
+    "comet_speed": 1.0,
+    "comet_color": (255, 0, 0),
+    "comet_size": 6,
+    "comet_direction": 1,
+    "pulse_speed": 0.05,
+    "pulse_color": (255, 255, 0),
+    "twinkle_freq": 0.05,
+    "twinkle_color": (255, 255, 255),
+    "flicker_speed": 1.0,
+    "flicker_intensity": 1.0,
+    "cars_num": 4,
+    "cars_colors": [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)],
+    "bubbles_color": (0, 255, 255),
+    "melt_points": None,  # None spreads four points evenly along the strip
+    "melt_color": (100, 0, 0),
+    "melt_spacing": 25,
+    "melt_speed": 1.0,
+    "fireworks_num": 3,
+    "fireworks_launch_freq": 0.5,
+    "fireworks_explosion_speed": 2.0,
+    "fireworks_fade_rate": 0.02,
+    "fireworks_flicker_rate": 5.0,
+    "fireworks_colors": [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)],
+}
+
+
+class EffectRenderer:
+    """Animation state for every effect, advanced by a fixed time step
+
+    All randomness comes from one seeded generator and time only moves when
+    step() is called, so the same seed and parameters always give the same frames.
+
+    With a ClipCache, the periodic effects (Rainbow Road, Pulse Wave) are served
+    from one cached period of frames, and clip_tag names the frame last returned.
+    """
+
+    def __init__(self, num_lights=DEFAULT_NUM_LIGHTS, seed=None, clip_cache=None):
+        self.engine = FrameEngine(num_lights, rng=np.random.default_rng(seed))
+        self.clip_cache = clip_cache
+        self.clip_tag = NO_CLIP_TAG
+        self.uncacheable = set()  # Clip keys already reported as too large for the cache
+        self.num_lights = self.engine.num_lights
+        self.rng = self.engine.rng
+        n = self.num_lights
+        self.t = 0.0
+        self.comet_head = 0.0
+        self.cars_positions = [i * n // 4 for i in range(4)]
+        self.cars_speeds = self.rng.uniform(0.05, 0.2, 4).tolist()
+        self.cars_directions = self.rng.choice([-1, 1], 4).tolist()
+        self.bubbles = [(int(self.rng.integers(n)), float(self.rng.uniform(0.05, 0.2)), int(self.rng.choice([-1, 1]))) for _ in range(5)]
+        self.fireworks_particles = ParticlePool()
+        self.fireworks_last_launch = 0.0
+        self._steps = {
+            "Rainbow Road": self._rainbow_road,
+            "Comet": self._comet,
+            "Pulse Wave": self._pulse_wave,
+            "Twinkle": self._twinkle,
+            "Fire Flicker": self._fire_flicker,
+            "Cars": self._cars,
+            "Bubbles": self._bubbles,
+            "Melting Points": self._melting_points,
+            "Fireworks": self._fireworks,
+        }
+
+    def reset_fireworks(self):
+        self.fireworks_particles.clear()
+
+    def step(self, effect, params, dt):
+        """Render the current frame of an effect, then advance its state by dt seconds"""
+        try:
+            step = self._steps[effect]
+        except KeyError:
+            raise ValueError(f"Unknown effect: {effect}")
+        self.clip_tag = NO_CLIP_TAG
+        return step(params, dt)
+
+    @staticmethod
+    def clip_length(t_step):
+        """Frames per cached period for a given step of t
+
+        About one frame per step, rounded up to a power of two so that nearby
+        speeds share a clip, and capped at MAX_CLIP_FRAMES so slow effects
+        stay small; the phase is then rounded to the nearest cached frame.
+        """
+        frames = max(MIN_CLIP_FRAMES, math.ceil(TWO_PI / t_step))
+        return min(MAX_CLIP_FRAMES, 1 << (frames - 1).bit_length())
+
+    def _periodic_frame(self, key, t_step, render):
+        """Frame for the current t from a cached period of an effect that repeats every 2*pi of t
+
+        The period is split into clip_length(t_step) evenly spaced frames, and
+        each one is rendered the first time it is needed. Returns None when
+        caching is off or one period would not fit in the cache.
+        """
+        if self.clip_cache is None or t_step <= 0:
+            return None
+        length = self.clip_length(t_step)
+        key = key + (self.num_lights, length)
+        clip = self.clip_cache.get(key)
+        if clip is None:
+            nbytes = length * self.num_lights * 3
+            if not self.clip_cache.fits(nbytes):
+                if key not in self.uncacheable:
+                    self.uncacheable.add(key)
+                    print(f"{key[0]}: one period ({nbytes / 2**20:.1f} MB) does not fit the clip cache, rendering live")
+                return None
+            clip = Clip(clip_id(key), length, (self.num_lights, 3))
+            self.clip_cache.put(key, clip, clip.nbytes)
+        index = round((self.t % TWO_PI) / TWO_PI * length) % length
+        if not clip.filled[index]:
+            clip.frames[index] = render(TWO_PI * index / length)
+            clip.filled[index] = True
+        self.clip_tag = (clip.id, index, length)
+        return clip.frames[index]
+
+    def _rainbow_road(self, p, dt):
+        lights = self._periodic_frame(("Rainbow Road",), p["rainbow_speed"] * dt, self.engine.rainbow_road)
+        if lights is None:
+            lights = self.engine.rainbow_road(self.t)
+        self.t += p["rainbow_speed"] * dt
+        return lights
+
+    def _comet(self, p, dt):
+        lights = self.engine.comet(self.comet_head, p["comet_color"], p["comet_size"], p["comet_direction"])
+        self.comet_head += (p["comet_speed"] * dt) * p["comet_direction"]
+        return lights
+
+    def _pulse_wave(self, p, dt):
+        color = tuple(p["pulse_color"])
+        lights = self._periodic_frame(("Pulse Wave", color), p["pulse_speed"] * dt,
+                                      lambda t: self.engine.pulse_wave(t, color))
+        if lights is None:
+            lights = self.engine.pulse_wave(self.t, color)
+        self.t += p["pulse_speed"] * dt
+        return lights
+
+    def _twinkle(self, p, dt):
+        lights = self.engine.twinkle(self.t, p["twinkle_freq"], p["twinkle_color"])
+        self.t += 0.05 * dt
+        return lights
+
+    def _fire_flicker(self, p, dt):
+        lights = self.engine.fire_flicker(self.t, p["flicker_speed"], p["flicker_intensity"])
+        self.t += 0.05 * dt
+        return lights
+
+    def _cars(self, p, dt):
+        lights = self.engine.cars(self.cars_positions, p["cars_colors"], p["cars_num"])
+        for i in range(4):
+            self.cars_positions[i] += self.cars_speeds[i] * self.cars_directions[i] * dt * 60  # Adjust for per second
+            if self.cars_positions[i] < 0 or self.cars_positions[i] >= self.num_lights:
+                self.cars_directions[i] *= -1
+                self.cars_positions[i] = max(0, min(self.num_lights - 1, self.cars_positions[i]))
+        return lights
+
+    def _bubbles(self, p, dt):
+        lights = self.engine.bubbles([pos for pos, _, _ in self.bubbles], p["bubbles_color"])
+        for i, (pos, speed, direction) in enumerate(self.bubbles):
+            pos += speed * direction * dt * 60  # Adjust for per second
+            if pos < 0 or pos >= self.num_lights:
+                direction *= -1
+                pos = max(0, min(self.num_lights - 1, pos))
+            self.bubbles[i] = (pos, speed, direction)
+        return lights
+
+    def _melting_points(self, p, dt):
+        points = p["melt_points"]
+        if points is None:
+            points = [(2 * i + 1) * self.num_lights // 8 for i in range(4)]
+        lights = self.engine.melting_points(points, p["melt_color"], p["melt_spacing"], self.t, p["melt_speed"])
+        self.t += dt
+        return lights
+
+    def _fireworks(self, p, dt):
+        lights, self.fireworks_last_launch = self.engine.fireworks(
+            self.t, p["fireworks_launch_freq"], p["fireworks_num"], p["fireworks_explosion_speed"],
+            p["fireworks_fade_rate"], p["fireworks_flicker_rate"], p["fireworks_colors"],
+            self.fireworks_particles, self.fireworks_last_launch)
+        self.t += dt
+        return lights
+
+
+def render_effect(effect, params=None, seed=0, num_frames=600, num_lights=DEFAULT_NUM_LIGHTS, fps=60):
+    """Render an effect headlessly as fast as possible, returning a (num_frames, N, 3) uint8 array"""
+    if effect not in EFFECTS:
+        raise ValueError(f"Unknown effect: {effect}")
+    renderer = EffectRenderer(num_lights, seed=seed)
+    merged = {**DEFAULT_PARAMS, **(params or {})}
+    frames = np.empty((num_frames, renderer.num_lights, 3), dtype=np.uint8)
+    dt = 1.0 / fps
+    for i in range(num_frames):
+        frames[i] = renderer.step(effect, merged, dt)
+    return frames
+
+
+if __name__ == '__main__':
+    # Headless benchmark: python frame_engine.py [num_lights] [num_frames]
+    import sys
+    import time
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    num_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    for effect in EFFECTS:
+        start = time.perf_counter()
+        render_effect(effect, num_frames=num_frames, num_lights=num_lights)
+        elapsed = time.perf_counter() - start
+        print(f"{effect:<15} {num_frames / elapsed:10.0f} frames/s ({num_lights} LEDs)")
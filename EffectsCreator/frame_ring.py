@@ -0,0 +1,93 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+DEFAULT_SLOTS = 4
+HEADER_WORDS = 2  # [latest sequence number, closed flag]
+TAG_WORDS = 3  # Per-slot [clip id, clip index, clip length], all 0 when not from a clip
+NO_TAG = (0, 0, 0)
+
+
+class FrameRing:
+    """Shared-memory ring of fixed-size (N, 3) frame slots with a sequence counter
+
+    One process writes frames and any number of processes read the newest one
+    without pickling. Each slot carries the sequence number it was written with,
+    so a reader can detect and retry a slot that was overwritten mid-copy, and a
+    tag telling the reader which cached clip frame it holds, if any.
+    """
+
+    def __init__(self, num_lights, name=None, slots=DEFAULT_SLOTS):
+        self.num_lights = int(num_lights)
+        self.slots = int(slots)
+        frame_bytes = self.num_lights * 3
+        meta_words = HEADER_WORDS + self.slots * (1 + TAG_WORDS)
+        size = 8 * meta_words + frame_bytes * self.slots
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        buf = self.shm.buf
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=buf)
+        self.slot_seq = np.ndarray((self.slots,), dtype=np.uint64, buffer=buf, offset=8 * HEADER_WORDS)
+        self.slot_tag = np.ndarray((self.slots, TAG_WORDS), dtype=np.uint64, buffer=buf,
+                                   offset=8 * (HEADER_WORDS + self.slots))
+        self.frames = np.ndarray((self.slots, self.num_lights, 3), dtype=np.uint8, buffer=buf,
+                                 offset=8 * meta_words)
+        self.last_tag = NO_TAG
+        if self.owner:
+            self.header.fill(0)
+            self.slot_seq.fill(0)
+            self.slot_tag.fill(0)
+
+    @property
+    def seq(self):
+        """Sequence number of the newest complete frame (0 before the first write)"""
+        return int(self.header[0])
+
+    @property
+    def closed(self):
+        return bool(self.header[1])
+
+    def write(self, frame, tag=NO_TAG):
+        """Publish a frame into the next slot"""
+        seq = self.seq + 1
+        slot = seq % self.slots
+        self.slot_seq[slot] = 0  # Mark the slot as being written
+        self.frames[slot] = frame
+        self.slot_tag[slot] = tag
+        self.slot_seq[slot] = seq
+        self.header[0] = seq
+        return seq
+
+    def read_latest(self, out, last_seq=0):
+        """Copy the newest frame into out and return its sequence number, or None if nothing newer than last_seq
+
+        The frame's clip tag is left in last_tag.
+        """
+        while True:
+            seq = self.seq
+            if seq == 0 or seq == last_seq:
+                return None
+            slot = seq % self.slots
+            out[:] = self.frames[slot]
+            tag = tuple(int(v) for v in self.slot_tag[slot])
+            if int(self.slot_seq[slot]) == seq:
+                self.last_tag = tag
+                return seq
+            # The writer lapped us while copying, try again with the newer frame
+
+    def finish(self):
+        """Tell readers that no more frames will be written"""
+        self.header[1] = 1
+
+    def close(self):
+        """Detach from the shared memory, and free it if this ring created it"""
+        self.header = self.slot_seq = self.slot_tag = self.frames = None
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except (BufferError, FileNotFoundError) as e:
+            print(f"Frame ring cleanup error: {e}")
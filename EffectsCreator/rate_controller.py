@@ -0,0 +1,100 @@
+from collections import deque
+import re
+import threading
+
+BITS_PER_BYTE = 10  # 8N1: start bit + 8 data bits + stop bit
+ACK_TIMEOUT = 1.0   # Frames not acknowledged within this many seconds are treated as never acknowledged
+# Device lines that answer a frame: its ack/echo names the LIGHTING.PUT0 or LIGHTING.PATCH0 command
+FRAME_ACK_PATTERN = re.compile(r'LIGHTING\.(PUT0|PATCH0)\b', re.IGNORECASE)
+
+
+def is_frame_ack(line):
+    """True when a line from the device acknowledges or echoes a frame command"""
+    return FRAME_ACK_PATTERN.search(line) is not None
+
+
+class RateController:
+    """Pick the highest refresh rate the serial link can sustain
+
+    Tracks smoothed (EWMA) measurements of how fast frames actually drain
+    through the port, how large encoded frames are and how long the device
+    takes to answer a frame, and turns them into a send interval. Only lines
+    matching is_frame_ack() count as answers. Frames left unanswered for
+    ack_timeout are forgotten, and once no answer has arrived for that long
+    the ack latency is dropped, so a device that stops answering (or never
+    did) can't hold the rate down.
+    """
+
+    def __init__(self, baud, min_hz=1.0, max_hz=120.0, headroom=0.85, max_in_flight=2, smoothing=0.2,
+                 ack_timeout=ACK_TIMEOUT):
+        self.link_bytes_per_sec = baud / BITS_PER_BYTE
+        self.min_hz = min_hz
+        self.max_hz = max_hz
+        self.headroom = headroom
+        self.max_in_flight = max_in_flight
+        self.smoothing = smoothing
+        self.ack_timeout = ack_timeout
+        self.write_bytes_per_sec = None
+        self.frame_bytes = None
+        self.ack_latency = None
+        self.last_ack = None
+        self.sent = 0
+        self.skipped = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+
+    def _ewma(self, old, new):
+        return new if old is None else old + self.smoothing * (new - old)
+
+    def _expire(self, now):
+        """Forget frames that were never acknowledged, and the latency once answers stop"""
+        while self._pending and now - self._pending[0] > self.ack_timeout:
+            self._pending.popleft()
+        if self.ack_latency is not None and (self.last_ack is None or now - self.last_ack > self.ack_timeout):
+            self.ack_latency = None
+
+    def record_write(self, nbytes, seconds, now, skipped=0):
+        """Record one frame written and flushed to the port, and how many newer frames replaced skipped ones"""
+        with self._lock:
+            self.frame_bytes = self._ewma(self.frame_bytes, nbytes)
+            if seconds > 0:
+                self.write_bytes_per_sec = self._ewma(self.write_bytes_per_sec, nbytes / seconds)
+            self._expire(now)
+            self._pending.append(now)
+            # The device does not answer every frame; keep only the most recent ones
+            while len(self._pending) > 4 * self.max_in_flight:
+                self._pending.popleft()
+            self.sent += 1
+            self.skipped += skipped
+
+    def record_ack(self, now):
+        """Record a frame ack/echo from the device answering the oldest unacknowledged frame"""
+        with self._lock:
+            self._expire(now)
+            if self._pending:
+                self.ack_latency = self._ewma(self.ack_latency, now - self._pending.popleft())
+                self.last_ack = now
+
+    @property
+    def target_hz(self):
+        with self._lock:
+            if self.frame_bytes is None:
+                return self.min_hz
+            throughput = self.link_bytes_per_sec
+            if self.write_bytes_per_sec is not None:
+                throughput = min(throughput, self.write_bytes_per_sec)
+            hz = self.headroom * throughput / self.frame_bytes
+            if self.ack_latency:
+                hz = min(hz, self.max_in_flight / self.ack_latency)
+            return max(self.min_hz, min(self.max_hz, hz))
+
+    @property
+    def interval(self):
+        return 1.0 / self.target_hz
+
+    def summary(self):
+        ack = f"{self.ack_latency * 1000:.0f} ms" if self.ack_latency else "n/a"
+        frame = f"{self.frame_bytes:.0f} B" if self.frame_bytes else "n/a"
+        rate = self.write_bytes_per_sec or self.link_bytes_per_sec
+        return (f"Auto rate {self.target_hz:.1f} Hz (link {rate / 1024:.1f} KB/s, frame {frame}, "
+                f"ack {ack}, {self.skipped} frames skipped)")
@@ -0,0 +1,53 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_controller import RateController, is_frame_ack
+
+
+class RateControllerTest(unittest.TestCase):
+    def setUp(self):
+        self.rate = RateController(921600, max_hz=120.0, max_in_flight=2, ack_timeout=1.0)
+
+    def test_only_frame_acks_match(self):
+        self.assertTrue(is_frame_ack("OK LIGHTING.PUT0"))
+        self.assertTrue(is_frame_ack("<lighting.patch0 ok>"))
+        self.assertFalse(is_frame_ack("Haven controller v2.3 booting"))
+        self.assertFalse(is_frame_ack("ERR: checksum"))
+
+    def test_acked_frames_limit_rate(self):
+        for i in range(20):
+            now = i * 0.1
+            self.rate.record_write(1000, 0.001, now)
+            self.rate.record_ack(now + 0.05)
+        self.assertAlmostEqual(self.rate.ack_latency, 0.05, places=6)
+        self.assertAlmostEqual(self.rate.target_hz, 2 / 0.05, places=3)
+
+    def test_stray_line_after_unacked_frames_is_ignored(self):
+        # The device never acks; old pending frames expire instead of pairing with a late line
+        for i in range(8):
+            self.rate.record_write(100, 0.001, i * 0.01)
+        self.rate.record_ack(5.0)
+        self.assertIsNone(self.rate.ack_latency)
+        self.assertEqual(self.rate.target_hz, 120.0)
+
+    def test_latency_resets_when_acks_stop(self):
+        self.rate.record_write(100, 0.001, 0.0)
+        self.rate.record_ack(0.5)
+        self.assertAlmostEqual(self.rate.target_hz, 2 / 0.5)
+        for i in range(1, 30):
+            self.rate.record_write(100, 0.001, 0.5 + i * 0.1)
+        self.assertIsNone(self.rate.ack_latency)
+        self.assertEqual(self.rate.target_hz, 120.0)
+
+    def test_skipped_frames_are_counted(self):
+        self.rate.record_write(1000, 0.001, 0.0, skipped=3)
+        self.rate.record_write(1000, 0.001, 0.1, skipped=2)
+        self.assertEqual(self.rate.skipped, 5)
+        self.assertIn("5 frames skipped", self.rate.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
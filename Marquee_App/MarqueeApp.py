@@ -10,9 +10,17 @@ import csv
 from queue import Queue, Empty
 import json
 import pygame
-import librosa
 import numpy as np
 from effects_window import EffectsWindow
+from serial_reader import read_line_batches
+from log_sink import TkLogSink
+from audio_loader import AudioLoader
+from analysis_cache import AnalysisCache
+from snap_index import SnapTargets, EdgeIndex
+from playback_clock import PlaybackClock
+from show_scheduler import ShowScheduler
+
+CURSOR_INTERVAL_MS = 16  # Playhead refresh during playback, about 60 Hz
 
 class SerialTerminal:
     def __init__(self, root):
@@ -30,14 +38,24 @@ class SerialTerminal:
         
         # Timeline audio variables
         self.audio_file_path = None
-        self.audio_data = None
+        self.audio_loader = None
+        self.analysis_cache = AnalysisCache()
+        self.peak_pyramid = None
         self.sample_rate = None
         self.audio_duration = 0
         self.is_playing = False
         self.playback_position = 0.0
         self.timeline_canvas = None
         self.cursor_line = None
+        self.channel_cursor_lines = []  # Persistent playhead line on each virtual channel canvas
+        self.cursor_x = None  # Pixel the playhead was last drawn at
+        self.playback_clock = PlaybackClock(pygame.mixer.music.get_pos)
+        self.show_scheduler = ShowScheduler(self.playback_clock, self.send_scheduled)
+        self.show_loaded = False  # A show is queued in the scheduler and should be reported on stop
+        self.write_lock = threading.Lock()  # The show scheduler writes from its own thread
         self.waveform_drawn = False
+        self.waveform_view = None  # Canvas x range (start, end) the viewport layers were drawn for
+        self.grid_positions = []
         self.timeline_update_job = None
         
         # Zoom variables
@@ -51,6 +69,7 @@ class SerialTerminal:
         self.dragging_color_block = None
         self.dragging_resize = None
         self.drag_start_x = 0
+        self.drag_moved = False
         self.selected_color_block = None
         self.selected_channel = None
         
@@ -67,6 +86,9 @@ class SerialTerminal:
         # Snap settings
         self.snap_distance = 20  # pixels - distance for snapping
         self.snap_enabled = True
+        self.beat_snap_enabled = True
+        self.snap_targets = None  # Beats, downbeats and onsets of the loaded track
+        self.edge_index = EdgeIndex()  # Sorted edges of every color block, for snapping
         self.last_snap_time = None  # Track when snapping occurred
         
         # Initialize effects window
@@ -147,6 +169,7 @@ class SerialTerminal:
         
         self.terminal = scrolledtext.ScrolledText(self.terminal_frame, state=tk.DISABLED, wrap=tk.WORD, font=("Consolas", 10))
         self.terminal.pack(fill=tk.BOTH, expand=True)
+        self.log_sink = TkLogSink(self.root, self.terminal)
         
         # Command frame
         self.cmd_frame = ttk.Frame(self.root)
@@ -167,6 +190,7 @@ class SerialTerminal:
         self.cmd_entry.focus_set()
     
     def save_to_file(self):
+        self.log_sink.flush()
         self.terminal.config(state=tk.NORMAL)
         content = self.terminal.get("1.0", tk.END)
         self.terminal.config(state=tk.DISABLED)
@@ -177,6 +201,7 @@ class SerialTerminal:
             messagebox.showinfo("Saved", "Terminal content saved.")
     
     def save_to_downloads(self):
+        self.log_sink.flush()
         self.terminal.config(state=tk.NORMAL)
         content = self.terminal.get("1.0", tk.END)
         self.terminal.config(state=tk.DISABLED)
@@ -236,21 +261,21 @@ class SerialTerminal:
         if self.connected:
             self.disconnect()
         
+        self.show_scheduler.shutdown()
+        
         # Quit pygame mixer
         pygame.mixer.quit()
+        self.log_sink.stop()
         self.root.quit()
     
     def read_serial(self):
-        while self.connected:
-            try:
-                if self.ser.in_waiting > 0:
-                    data = self.ser.readline().decode('utf-8', errors='ignore').rstrip()
-                    if data:
-                        self.log(f"RX: {data}")
-                        self.response_queue.put(data)
-            except Exception as e:
-                self.log(f"Read error: {e}")
-                break
+        try:
+            for lines in read_line_batches(self.ser, lambda: self.connected):
+                for data in lines:
+                    self.log(f"RX: {data}")
+                    self.response_queue.put(data)
+        except Exception as e:
+            self.log(f"Read error: {e}")
         self.connected = False
     
     def send_cmd(self, event=None):
@@ -263,7 +288,8 @@ class SerialTerminal:
     def send_raw(self, cmd):
         if self.connected:
             try:
-                self.ser.write((cmd + "\r\n").encode())
+                with self.write_lock:
+                    self.ser.write((cmd + "\r\n").encode())
                 self.log(f"TX: {cmd}")
             except Exception as e:
                 self.log(f"TX Error: {e}")
@@ -289,11 +315,9 @@ class SerialTerminal:
             return 0
     
     def log(self, msg):
-        self.terminal.config(state=tk.NORMAL)
+        """Queue a timestamped line for the terminal; safe to call from any thread"""
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        self.terminal.insert(tk.END, f"[{timestamp}] {msg}\n")
-        self.terminal.see(tk.END)
-        self.terminal.config(state=tk.DISABLED)
+        self.log_sink.write(f"[{timestamp}] {msg}")
     
     def open_audio_timeline(self):
         """Open the Audio Timeline window with Final Cut Pro-like interface"""
@@ -341,6 +365,8 @@ class SerialTerminal:
         # Snap toggle
         self.snap_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(zoom_frame, text="Snap", variable=self.snap_var, command=self.toggle_snap, style='Large.TCheckbutton').pack(side=tk.RIGHT, padx=(10, 0))
+        self.beat_snap_var = tk.BooleanVar(value=self.beat_snap_enabled)
+        ttk.Checkbutton(zoom_frame, text="Beats", variable=self.beat_snap_var, command=self.toggle_beat_snap, style='Large.TCheckbutton').pack(side=tk.RIGHT, padx=(10, 0))
         
         # Timeline canvas with scrollbars
         canvas_frame = ttk.Frame(timeline_frame)
@@ -483,11 +509,86 @@ class SerialTerminal:
             self.load_audio_file(file_path)
     
     def load_audio_file(self, file_path):
-        """Load and analyze the audio file"""
+        """Start decoding the audio file in the background"""
+        if self.audio_loader:
+            self.audio_loader.cancel()
+        if self.is_playing:
+            self.stop_playback()
+        
+        # Nothing can play until the new file is ready
+        self.audio_file_path = None
+        self.peak_pyramid = None
+        self.snap_targets = None
+        self.audio_duration = 0
+        self.waveform_drawn = False
+        self.draw_empty_timeline()
+        
+        filename = os.path.basename(file_path)
+        self.audio_file_label.config(text=f"Loading {filename}...", foreground="gray")
+        
+        # Decoding and peak computation run on a worker thread, the UI polls for progress
+        self.audio_loader = AudioLoader(file_path, cache=self.analysis_cache)
+        self.audio_loader.start()
+        self.root.after(100, self.poll_audio_loader, self.audio_loader)
+    
+    def poll_audio_loader(self, loader):
+        """Apply progress, previews and the result of a background audio load"""
+        if loader is not self.audio_loader or loader.cancelled:
+            return
+        
+        filename = os.path.basename(loader.file_path)
+        preview = None
+        while True:
+            try:
+                message = loader.messages.get_nowait()
+            except Empty:
+                break
+            
+            if message[0] == 'progress':
+                _, fraction, pyramid, duration = message
+                self.audio_file_label.config(text=f"Loading {filename}... {int(fraction * 100)}%")
+                if pyramid is not None:
+                    preview = (pyramid, duration)
+            elif message[0] == 'done':
+                # Keep polling, beat analysis follows. Drop any partial preview
+                # from this batch so it cannot replace the full pyramid
+                preview = None
+                self.finish_audio_load(loader.file_path, message[1], loader.from_cache)
+            elif message[0] == 'events':
+                self.audio_loader = None
+                self.snap_targets = SnapTargets(message[1])
+                counts = ", ".join(f"{len(message[1].get(kind, []))} {kind}" for kind in SnapTargets.LABELS)
+                self.log(f"Beat analysis ready: {counts}")
+                return
+            elif message[0] == 'events_error':
+                self.audio_loader = None
+                self.log(f"Beat analysis failed: {message[1]}")
+                return
+            elif message[0] == 'error':
+                self.audio_loader = None
+                self.audio_file_label.config(text="No file selected", foreground="gray")
+                messagebox.showerror("Error", f"Failed to load audio file: {message[1]}")
+                self.log(f"Error loading audio file: {message[1]}")
+                return
+        
+        # Coarse preview of the part decoded so far
+        if preview:
+            first_preview = self.peak_pyramid is None
+            self.peak_pyramid, self.audio_duration = preview
+            if first_preview:
+                self.draw_waveform()
+            else:
+                self.draw_waveform_view()
+        
+        self.root.after(100, self.poll_audio_loader, loader)
+    
+    def finish_audio_load(self, file_path, pyramid, from_cache=False):
+        """Install a fully decoded audio file in the timeline"""
         try:
-            # Load audio file with librosa
-            self.audio_data, self.sample_rate = librosa.load(file_path, sr=None)
-            self.audio_duration = len(self.audio_data) / self.sample_rate
+            # Min/max peaks let any zoom level draw without rescanning the samples
+            self.peak_pyramid = pyramid
+            self.sample_rate = pyramid.sample_rate
+            self.audio_duration = pyramid.duration
             self.audio_file_path = file_path
             
             # Update UI
@@ -506,7 +607,7 @@ class SerialTerminal:
             # Draw waveform
             self.draw_waveform()
             
-            self.log(f"Audio file loaded: {filename}")
+            self.log(f"Audio file loaded: {filename}" + (" (cached analysis)" if from_cache else ""))
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load audio file: {str(e)}")
@@ -514,7 +615,7 @@ class SerialTerminal:
     
     def draw_waveform(self):
         """Draw the audio waveform on the timeline canvas"""
-        if self.audio_data is None:
+        if self.peak_pyramid is None:
             return
         
         self.timeline_canvas.delete("all")
@@ -529,50 +630,94 @@ class SerialTerminal:
         for channel_canvas in self.channel_canvases:
             channel_canvas.configure(scrollregion=(0, 0, canvas_width, 60))
         
-        # Calculate waveform data
-        samples_per_pixel = len(self.audio_data) // canvas_width
-        if samples_per_pixel == 0:
-            samples_per_pixel = 1
-        
-        waveform_points = []
-        for x in range(canvas_width):
-            start_sample = x * samples_per_pixel
-            end_sample = min(start_sample + samples_per_pixel, len(self.audio_data))
-            
-            if start_sample < len(self.audio_data):
-                segment = self.audio_data[start_sample:end_sample]
-                if len(segment) > 0:
-                    max_val = np.max(np.abs(segment))
-                    height = int(max_val * (canvas_height // 2 - 10))
-                    waveform_points.append((x, canvas_height // 2 - height, x, canvas_height // 2 + height))
-        
-        # Draw waveform
-        for x, y1, x2, y2 in waveform_points:
-            self.timeline_canvas.create_line(x, y1, x2, y2, fill="#4CAF50", width=1)
-        
-        # Draw time markers based on zoom level
-        marker_interval = self.get_time_marker_interval()
-        current_time = 0
-        while current_time <= self.audio_duration:
-            x = int(current_time * self.zoom_level)
-            if x < canvas_width:
-                self.timeline_canvas.create_line(x, 0, x, canvas_height, fill="#666666", width=1)
-                self.timeline_canvas.create_text(x + 2, 10, anchor="w", text=self.format_time(current_time), fill="white", font=("Arial", 8))
-            current_time += marker_interval
-        
-        # Draw center line
-        self.timeline_canvas.create_line(0, canvas_height // 2, canvas_width, canvas_height // 2, fill="#333333", width=1)
-        
         # Create cursor line
         self.cursor_line = self.timeline_canvas.create_line(0, 0, 0, canvas_height, fill="#FF5722", width=3)
+        self.cursor_x = None
         
         self.waveform_drawn = True
+        
+        # Waveform, time markers and grid only exist around the visible range
+        self.draw_waveform_view()
         self.update_cursor_position()
         self.update_zoom_label()
         
         # Draw virtual channel timelines
         self.draw_virtual_channels()
     
+    def get_visible_timeline_range(self):
+        """Get the canvas x range currently shown in the timeline"""
+        left = self.timeline_canvas.canvasx(0)
+        width = self.timeline_canvas.winfo_width()
+        if width <= 1:
+            width = 1000  # Not mapped yet, assume the default window width
+        return left, left + width
+    
+    def draw_waveform_view(self):
+        """Draw the waveform, time markers and channel grid for the visible range plus one screen either side
+        
+        Items are tagged "viewport" (timeline) and "grid" (channels) and replaced on every call,
+        so the item count depends on the window width, not on the track length or zoom level.
+        """
+        left, right = self.get_visible_timeline_range()
+        margin = right - left
+        canvas_width = max(800, int(self.audio_duration * self.zoom_level))
+        canvas_height = 150
+        center = canvas_height // 2
+        start = max(0, int(left - margin))
+        end = min(canvas_width, int(right + margin) + 1)
+        self.waveform_view = (start, end)
+        
+        self.timeline_canvas.delete("viewport")
+        
+        # Waveform as one filled outline built from the nearest level of the peak pyramid
+        audio_end = min(end, int(self.audio_duration * self.zoom_level))
+        if audio_end - start >= 2:
+            mins, maxs = self.peak_pyramid.peaks(start / self.zoom_level, 1.0 / self.zoom_level, audio_end - start)
+            heights = (np.maximum(maxs, -mins) * (center - 10)).astype(int)
+            xs = np.arange(start, audio_end)
+            top = np.column_stack((xs, center - heights)).ravel()
+            bottom = np.column_stack((xs[::-1], center + heights[::-1])).ravel()
+            self.timeline_canvas.create_polygon(np.concatenate((top, bottom)).tolist(), fill="#4CAF50", outline="#4CAF50", width=1, tags="viewport")
+        
+        # Draw time markers based on zoom level
+        marker_interval = self.get_time_marker_interval()
+        grid_positions = []
+        index = int(np.ceil(start / self.zoom_level / marker_interval))
+        while index * marker_interval <= self.audio_duration:
+            current_time = index * marker_interval
+            x = int(current_time * self.zoom_level)
+            if x >= end:
+                break
+            grid_positions.append(x)
+            self.timeline_canvas.create_line(x, 0, x, canvas_height, fill="#666666", width=1, tags="viewport")
+            self.timeline_canvas.create_text(x + 2, 10, anchor="w", text=self.format_time(current_time), fill="white", font=("Arial", 8), tags="viewport")
+            index += 1
+        
+        # Draw center line
+        self.timeline_canvas.create_line(start, center, end, center, fill="#333333", width=1, tags="viewport")
+        self.timeline_canvas.tag_raise(self.cursor_line)
+        
+        # Time grid lines matching the audio timeline, kept below the color blocks
+        self.grid_positions = grid_positions
+        for channel_canvas in self.channel_canvases:
+            self.draw_channel_grid(channel_canvas)
+    
+    def draw_channel_grid(self, channel_canvas):
+        """Draw the time grid of the rendered range on a virtual channel canvas"""
+        channel_canvas.delete("grid")
+        for x in self.grid_positions:
+            channel_canvas.create_line(x, 0, x, 60, fill="#444444", width=1, tags="grid")
+        channel_canvas.tag_lower("grid")
+    
+    def refresh_waveform_view(self):
+        """Re-render the viewport layers once the visible range leaves the rendered one"""
+        if not self.waveform_drawn:
+            return
+        left, right = self.get_visible_timeline_range()
+        if self.waveform_view and self.waveform_view[0] <= left and right <= self.waveform_view[1]:
+            return
+        self.draw_waveform_view()
+    
     def draw_empty_timeline(self):
         """Draw an empty timeline when no file is loaded"""
         self.timeline_canvas.delete("all")
@@ -615,6 +760,8 @@ class SerialTerminal:
         """Handle timeline canvas resize"""
         if not self.waveform_drawn:
             self.draw_empty_timeline()
+        else:
+            self.refresh_waveform_view()
     
     def seek_to_position(self, position):
         """Seek to a specific position in the audio"""
@@ -625,6 +772,10 @@ class SerialTerminal:
         # If playing, restart from new position
         if self.is_playing:
             pygame.mixer.music.set_pos(position)
+        self.playback_clock.seek(position)
+        
+        # Scheduled commands resume from the new position instead of firing everything skipped over
+        self.show_scheduler.seek(position)
     
     def toggle_playback(self):
         """Toggle play/pause"""
@@ -644,6 +795,8 @@ class SerialTerminal:
                 pygame.mixer.music.play(start=self.playback_position)
             else:
                 pygame.mixer.music.play()
+            self.playback_clock.start(self.playback_position)
+            self.show_scheduler.resume()
             
             self.is_playing = True
             self.play_button.config(text="⏸ Pause")
@@ -655,13 +808,25 @@ class SerialTerminal:
     def pause_playback(self):
         """Pause audio playback"""
         pygame.mixer.music.pause()
+        self.show_scheduler.pause()
+        self.playback_clock.pause()
+        self.playback_position = self.playback_clock.position()
         self.is_playing = False
         self.play_button.config(text="▶ Play")
         self.stop_timeline_update()
+        self.log(self.playback_clock.drift_summary())
     
     def stop_playback(self):
         """Stop audio playback"""
         pygame.mixer.music.stop()
+        self.show_scheduler.stop()
+        if self.is_playing:
+            self.log(self.playback_clock.drift_summary())
+        if self.show_loaded:
+            self.show_loaded = False
+            self.log(self.show_scheduler.jitter_summary())
+        self.playback_clock.pause()
+        self.playback_clock.seek(0.0)
         self.is_playing = False
         self.playback_position = 0.0
         self.play_button.config(text="▶ Play")
@@ -675,6 +840,7 @@ class SerialTerminal:
     
     def start_timeline_update(self):
         """Start the timeline cursor update loop"""
+        self.playback_clock.reset_drift()
         self.update_timeline_cursor()
     
     def stop_timeline_update(self):
@@ -686,8 +852,9 @@ class SerialTerminal:
     def update_timeline_cursor(self):
         """Update the timeline cursor position during playback"""
         if self.is_playing and pygame.mixer.music.get_busy():
-            # Estimate playback position (pygame doesn't provide exact position)
-            self.playback_position += 0.05  # Update every 50ms
+            # Playback position from the clock anchored at play/seek, checked against the audio device
+            self.playback_clock.sample_drift()
+            self.playback_position = self.playback_clock.position()
             
             if self.playback_position >= self.audio_duration:
                 self.stop_playback()
@@ -696,8 +863,8 @@ class SerialTerminal:
             self.update_cursor_position()
             self.update_position_display()
             
-            # Schedule next update (50ms for smooth animation)
-            self.timeline_update_job = self.timeline_window.after(50, self.update_timeline_cursor)
+            # Schedule next update at display rate
+            self.timeline_update_job = self.timeline_window.after(CURSOR_INTERVAL_MS, self.update_timeline_cursor)
         else:
             self.stop_timeline_update()
     
@@ -705,14 +872,15 @@ class SerialTerminal:
         """Update the visual cursor position on the timeline"""
         if self.cursor_line and self.waveform_drawn:
             x_position = self.playback_position * self.zoom_level  # Use zoom level
+            if round(x_position) == self.cursor_x:
+                return  # Still on the same pixel, nothing to redraw or scroll
+            self.cursor_x = round(x_position)
             canvas_height = 150  # Updated height
             self.timeline_canvas.coords(self.cursor_line, x_position, 0, x_position, canvas_height)
             
-            # Also draw cursor on all virtual channel timelines
-            for i, channel_canvas in enumerate(self.channel_canvases):
-                cursor_tag = f"cursor_channel_{i+1}"
-                channel_canvas.delete(cursor_tag)
-                channel_canvas.create_line(x_position, 0, x_position, 60, fill="#FF5722", width=3, tags=cursor_tag)
+            # Move the persistent cursor on all virtual channel timelines
+            for channel_canvas, cursor_line in zip(self.channel_canvases, self.channel_cursor_lines):
+                channel_canvas.coords(cursor_line, x_position, 0, x_position, 60)
             
             # Auto-scroll to keep cursor visible
             canvas_width = self.timeline_canvas.winfo_width()
@@ -723,17 +891,16 @@ class SerialTerminal:
                 # Center the cursor in the view
                 total_canvas_width = self.audio_duration * self.zoom_level
                 if total_canvas_width > 0:
-                    scroll_fraction = max(0, min(1, (x_position - canvas_width // 2) / total_canvas_width))
-                    self.timeline_canvas.xview_moveto(scroll_fraction)
-                    # Sync all virtual channel scrolling
-                    for channel_canvas in self.channel_canvases:
-                        channel_canvas.xview_moveto(scroll_fraction)
+                    self.scroll_timeline_to((x_position - canvas_width // 2) / total_canvas_width)
     
     def update_position_display(self):
         """Update the position display label"""
         current_time = self.format_time(self.playback_position)
         total_time = self.format_time(self.audio_duration) if self.audio_duration > 0 else "00:00"
-        self.position_label.config(text=f"{current_time} / {total_time}")
+        text = f"{current_time} / {total_time}"
+        # Called every playhead tick, but the text only changes once a second
+        if self.position_label.cget("text") != text:
+            self.position_label.config(text=text)
     
     def format_time(self, seconds):
         """Format seconds as MM:SS"""
@@ -805,11 +972,7 @@ class SerialTerminal:
             new_x = current_time * self.zoom_level
             total_width = self.audio_duration * self.zoom_level
             if total_width > 0:
-                scroll_fraction = max(0, min(1, (new_x - self.timeline_canvas.winfo_width() // 2) / total_width))
-                self.timeline_canvas.xview_moveto(scroll_fraction)
-                # Sync all virtual channel scrolling
-                for channel_canvas in self.channel_canvases:
-                    channel_canvas.xview_moveto(scroll_fraction)
+                self.scroll_timeline_to((new_x - self.timeline_canvas.winfo_width() // 2) / total_width)
     
     def update_zoom_label(self):
         """Update the zoom level display"""
@@ -869,11 +1032,7 @@ class SerialTerminal:
             if total_width > 0:
                 # Calculate scroll position to keep mouse time position centered
                 target_scroll_x = new_x - event.x
-                scroll_fraction = max(0, min(1, target_scroll_x / total_width))
-                self.timeline_canvas.xview_moveto(scroll_fraction)
-                # Sync all virtual channel scrolling
-                for channel_canvas in self.channel_canvases:
-                    channel_canvas.xview_moveto(scroll_fraction)
+                self.scroll_timeline_to(target_scroll_x / total_width)
             
             # Update button states
             self.update_zoom_button_states()
@@ -911,7 +1070,7 @@ class SerialTerminal:
             new_block['start_time'] = self.playback_position
             new_block['end_time'] = self.playback_position + duration
             channel_key = f"channel_{self.selected_channel}"
-            self.virtual_channels[channel_key].append(new_block)
+            self.add_color_block(channel_key, new_block)
             self.draw_virtual_channels()
             self.log("Action pasted")
         elif event.keysym == 's':
@@ -933,14 +1092,16 @@ class SerialTerminal:
             for channel_canvas in self.channel_canvases:
                 channel_canvas.xview_scroll(scroll_amount, scroll_unit)
         
-        # Update cursor positions after scrolling to maintain alignment
-        if hasattr(self, 'cursor_line') and self.waveform_drawn:
-            x_position = self.playback_position * self.zoom_level
-            # Redraw cursors on all virtual channels with current position
-            for i, channel_canvas in enumerate(self.channel_canvases):
-                cursor_tag = f"cursor_channel_{i+1}"
-                channel_canvas.delete(cursor_tag)
-                channel_canvas.create_line(x_position, 0, x_position, 60, fill="#FF5722", width=3, tags=cursor_tag)
+        # Draw whatever scrolled into view (cursors are in canvas coordinates and scroll with it)
+        self.refresh_waveform_view()
+    
+    def scroll_timeline_to(self, fraction):
+        """Scroll the audio and all virtual channel timelines to the same position"""
+        scroll_fraction = max(0, min(1, fraction))
+        self.timeline_canvas.xview_moveto(scroll_fraction)
+        for channel_canvas in self.channel_canvases:
+            channel_canvas.xview_moveto(scroll_fraction)
+        self.refresh_waveform_view()
     
     def create_color_palette(self):
         """Create the color palette with predefined colors"""
@@ -989,8 +1150,6 @@ class SerialTerminal:
         if not hasattr(self, 'channel_canvases') or self.audio_duration == 0:
             return
         
-        canvas_width = max(800, int(self.audio_duration * self.zoom_level))
-        
         # Clear transition buttons
         self.transition_buttons = {}
         
@@ -998,14 +1157,8 @@ class SerialTerminal:
         for channel_idx, channel_canvas in enumerate(self.channel_canvases):
             channel_canvas.delete("all")
             
-            # Draw time grid lines matching audio timeline
-            marker_interval = self.get_time_marker_interval()
-            current_time = 0
-            while current_time <= self.audio_duration:
-                x = int(current_time * self.zoom_level)
-                if x < canvas_width:
-                    channel_canvas.create_line(x, 0, x, 60, fill="#444444", width=1)
-                current_time += marker_interval
+            # Draw time grid lines matching audio timeline (visible range only)
+            self.draw_channel_grid(channel_canvas)
             
             # Draw color blocks for this channel
             channel_key = f"channel_{channel_idx + 1}"
@@ -1018,15 +1171,38 @@ class SerialTerminal:
                 # Draw transition buttons between snapped blocks
                 self.draw_transition_buttons(channel_canvas, color_blocks, channel_idx + 1)
         
-        # Redraw cursors on all virtual channels after clearing
-        if hasattr(self, 'cursor_line') and self.waveform_drawn:
-            x_position = self.playback_position * self.zoom_level
-            for i, channel_canvas in enumerate(self.channel_canvases):
-                cursor_tag = f"cursor_channel_{i+1}"
-                channel_canvas.create_line(x_position, 0, x_position, 60, fill="#FF5722", width=3, tags=cursor_tag)
+        # Recreate the persistent cursors after clearing; update_cursor_position only moves them
+        x_position = self.playback_position * self.zoom_level
+        state = tk.NORMAL if self.waveform_drawn else tk.HIDDEN
+        self.channel_cursor_lines = [
+            channel_canvas.create_line(x_position, 0, x_position, 60, fill="#FF5722", width=3, state=state)
+            for channel_canvas in self.channel_canvases
+        ]
+        self.cursor_x = None
     
     def draw_color_block(self, canvas, color_block):
         """Draw a single color block on a virtual channel"""
+        # Every item is created once and positioned by update_color_block_items,
+        # so a drag only has to move the items of the dragged block
+        block_rect = canvas.create_rectangle(0, 10, 0, 50, fill=color_block['color'], outline="white", width=2)
+        duration_text = canvas.create_text(0, 30, text="", fill="white", font=("Arial", 8, "bold"))
+        left_handle = canvas.create_rectangle(0, 20, 0, 40, fill="white", outline="black", width=1)
+        right_handle = canvas.create_rectangle(0, 20, 0, 40, fill="white", outline="black", width=1)
+        highlight = canvas.create_rectangle(0, 8, 0, 52, outline="#FFD700", width=3, fill="", state=tk.HIDDEN)
+        
+        # Store references in color block
+        color_block['canvas_items'] = {
+            'rect': block_rect,
+            'text': duration_text,
+            'left_handle': left_handle,
+            'right_handle': right_handle,
+            'highlight': highlight
+        }
+        self.update_color_block_items(canvas, color_block)
+    
+    def update_color_block_items(self, canvas, color_block):
+        """Move and relabel the canvas items of a color block to match its times"""
+        items = color_block['canvas_items']
         start_x = color_block['start_time'] * self.zoom_level
         end_x = color_block['end_time'] * self.zoom_level
         width = end_x - start_x
@@ -1035,45 +1211,21 @@ class SerialTerminal:
             width = 5
             end_x = start_x + width
         
-        # Create color block rectangle
-        block_rect = canvas.create_rectangle(
-            start_x, 10, end_x, 50,
-            fill=color_block['color'], outline="white", width=2
-        )
+        canvas.coords(items['rect'], start_x, 10, end_x, 50)
         
-        # Add duration text if block is wide enough
-        if width > 40:
-            text_x = start_x + width // 2
-            canvas.create_text(
-                text_x, 30,
-                text=f"{self.format_time(color_block['end_time'] - color_block['start_time'])}",
-                fill="white", font=("Arial", 8, "bold")
-            )
+        # Duration text only if block is wide enough
+        canvas.coords(items['text'], start_x + width // 2, 30)
+        duration = self.format_time(color_block['end_time'] - color_block['start_time'])
+        canvas.itemconfig(items['text'], text=duration if width > 40 else "")
         
-        # Add resize handles
+        # Resize handles
         handle_size = 6
-        left_handle = canvas.create_rectangle(
-            start_x - handle_size // 2, 20, start_x + handle_size // 2, 40,
-            fill="white", outline="black", width=1
-        )
-        right_handle = canvas.create_rectangle(
-            end_x - handle_size // 2, 20, end_x + handle_size // 2, 40,
-            fill="white", outline="black", width=1
-        )
-        
-        # Store references in color block
-        color_block['canvas_items'] = {
-            'rect': block_rect,
-            'left_handle': left_handle,
-            'right_handle': right_handle
-        }
+        canvas.coords(items['left_handle'], start_x - handle_size // 2, 20, start_x + handle_size // 2, 40)
+        canvas.coords(items['right_handle'], end_x - handle_size // 2, 20, end_x + handle_size // 2, 40)
         
         # Highlight selected block
-        if color_block == self.selected_color_block:
-            canvas.create_rectangle(
-                start_x - 2, 8, end_x + 2, 52,
-                outline="#FFD700", width=3, fill=""
-            )
+        canvas.coords(items['highlight'], start_x - 2, 8, end_x + 2, 52)
+        canvas.itemconfig(items['highlight'], state=tk.NORMAL if color_block is self.selected_color_block else tk.HIDDEN)
     
     def on_palette_click(self, event):
         """Handle clicks on the color palette"""
@@ -1124,7 +1276,7 @@ class SerialTerminal:
                             }
                             
                             channel_key = f"channel_{channel_idx + 1}"
-                            self.virtual_channels[channel_key].append(new_color_block)
+                            self.add_color_block(channel_key, new_color_block)
                             self.draw_virtual_channels()
                             
                             self.log(f"Added {self.dragging_color} color to Virtual Channel {channel_idx + 1} at {self.format_time(start_time)}")
@@ -1229,53 +1381,71 @@ class SerialTerminal:
         # Sort color blocks by start time
         sorted_blocks = sorted(all_color_blocks, key=lambda x: x['start_time'])
         
-        # Start audio playback
-        self.start_playback()
-        
-        # Schedule color block executions
+        # Compile every block up front; the show scheduler thread sends them against the playback clock
+        commands = []
         for color_block in sorted_blocks:
-            delay_ms = int(color_block['start_time'] * 1000)
             duration_ms = int((color_block['end_time'] - color_block['start_time']) * 1000)
-            
-            # Schedule color block execution
-            self.timeline_window.after(delay_ms, lambda cb=color_block, dur=duration_ms: self.execute_single_color_block(cb, dur))
+            commands.append((color_block['start_time'],) + self.compile_color_block(color_block, duration_ms))
+        self.load_show(commands)
+        
+        # Start audio playback
+        self.start_playback()
         
         self.log(f"Executing {len(sorted_blocks)} color blocks with transitions synchronized with audio")
     
-    def execute_single_color_block(self, color_block, duration_ms):
-        """Execute a single color block on a virtual channel with transition support"""
+    def load_show(self, commands):
+        """Queue (start_time, command, description) tuples in the show scheduler from the current position"""
+        if self.show_loaded:
+            self.log(self.show_scheduler.jitter_summary())
+        self.show_scheduler.load(commands, self.playback_position)
+        self.show_loaded = True
+    
+    def send_scheduled(self, cmd, description, late):
+        """Send a command from the show scheduler thread and log how late it went out"""
         if self.connected:
-            channel_num = color_block['channel']
-            channel_key = f"channel_{channel_num}"
-            
-            # Check if there's a transition from the previous block
-            transition_type = "none"
-            from_color = None
-            
-            # Find if there's a previous block that this transitions from
-            if channel_key in self.transitions:
-                for transition in self.transitions[channel_key]:
-                    if transition['to_block'] == color_block:
-                        transition_type = transition['type']
-                        from_color = transition['from_block']['color']
-                        break
-            
-            # Generate appropriate command based on transition type
-            if transition_type != "none" and from_color:
-                cmd = self.get_transition_command(from_color, color_block['color'], transition_type, duration_ms)
-                self.log(f"Executed {transition_type} transition from {from_color} to {color_block['color']} on Virtual Channel {channel_num}")
-            else:
-                # Standard color command without transition
-                cmd = f'<LIGHTING.ON({{"CH": [{channel_num}], "COLOR": "{color_block["color"]}", "DURATION": {duration_ms}}})'
-                self.log(f"Executed {color_block['color']} on Virtual Channel {channel_num} for {duration_ms}ms")
-            
             self.send_raw(cmd)
+            self.log(f"Executed {description} ({late * 1000:+.1f} ms)")
+    
+    def compile_color_block(self, color_block, duration_ms):
+        """Build the command for a color block on a virtual channel with transition support
+        
+        Returns (command, description).
+        """
+        channel_num = color_block['channel']
+        channel_key = f"channel_{channel_num}"
+        
+        # Check if there's a transition from the previous block
+        transition_type = "none"
+        from_color = None
+        
+        # Find if there's a previous block that this transitions from
+        if channel_key in self.transitions:
+            for transition in self.transitions[channel_key]:
+                if transition['to_block'] == color_block:
+                    transition_type = transition['type']
+                    from_color = transition['from_block']['color']
+                    break
+        
+        # Generate appropriate command based on transition type
+        if transition_type != "none" and from_color:
+            cmd = self.get_transition_command(from_color, color_block['color'], transition_type, duration_ms)
+            return cmd, f"{transition_type} transition from {from_color} to {color_block['color']} on Virtual Channel {channel_num}"
+        
+        # Standard color command without transition
+        cmd = f'<LIGHTING.ON({{"CH": [{channel_num}], "COLOR": "{color_block["color"]}", "DURATION": {duration_ms}}})'
+        return cmd, f"{color_block['color']} on Virtual Channel {channel_num} for {duration_ms}ms"
+    
+    def add_color_block(self, channel_key, color_block):
+        """Add a color block to a virtual channel and to the snap edge index"""
+        self.virtual_channels[channel_key].append(color_block)
+        self.edge_index.add_block(channel_key, color_block)
     
     def delete_selected_color_block(self):
         """Delete the currently selected color block"""
         if self.selected_color_block and self.selected_channel:
             channel_key = f"channel_{self.selected_channel}"
             self.virtual_channels[channel_key].remove(self.selected_color_block)
+            self.edge_index.remove_block(self.selected_color_block)
             self.selected_color_block = None
             self.selected_channel = None
             self.draw_virtual_channels()
@@ -1289,6 +1459,7 @@ class SerialTerminal:
             if result:
                 for channel_key in self.virtual_channels:
                     self.virtual_channels[channel_key] = []
+                self.edge_index.clear()
                 # Clear all transitions as well
                 for channel_key in self.transitions:
                     self.transitions[channel_key] = []
@@ -1310,24 +1481,13 @@ class SerialTerminal:
         snap_happened = False
         
         # Check snapping against other color blocks in all channels
-        for ch_key, color_blocks in self.virtual_channels.items():
-            for color_block in color_blocks:
-                if color_block == current_color_block:
-                    continue
-                
-                snap_points = [
-                    ('start', color_block['start_time']), 
-                    ('end', color_block['end_time'])
-                ]
-                
-                for snap_type, snap_point in snap_points:
-                    distance = abs(target_time - snap_point)
-                    
-                    if distance < snap_threshold and distance < min_distance:
-                        min_distance = distance
-                        closest_snap_time = snap_point
-                        snapped_to = f"{ch_key} {snap_type}"
-                        snap_happened = True
+        edge = self.edge_index.nearest(target_time, snap_threshold, exclude=current_color_block)
+        if edge:
+            snap_point, ch_key, snap_type = edge
+            min_distance = abs(target_time - snap_point)
+            closest_snap_time = snap_point
+            snapped_to = f"{ch_key} {snap_type}"
+            snap_happened = True
         
         # Also snap to timeline start (0) and end
         timeline_points = [('start', 0), ('end', self.audio_duration)]
@@ -1339,6 +1499,14 @@ class SerialTerminal:
                 snapped_to = f"Timeline {snap_type}"
                 snap_happened = True
         
+        # Musical events use half the threshold so a dense run of onsets doesn't swallow block edges
+        if self.beat_snap_enabled and self.snap_targets:
+            event = self.snap_targets.nearest(target_time, snap_threshold / 2)
+            if event and abs(target_time - event[0]) < min_distance:
+                min_distance = abs(target_time - event[0])
+                closest_snap_time, snapped_to = event
+                snap_happened = True
+        
         # Log snap feedback if snapping occurred
         if snap_happened and snapped_to:
             current_time = time.time()
@@ -1356,6 +1524,16 @@ class SerialTerminal:
         else:
             self.log("Snapping disabled")
     
+    def toggle_beat_snap(self):
+        """Toggle snapping to beats, downbeats and onsets"""
+        self.beat_snap_enabled = self.beat_snap_var.get()
+        if not self.beat_snap_enabled:
+            self.log("Beat snapping disabled")
+        elif self.snap_targets is None:
+            self.log("Beat snapping enabled (analysis still running)")
+        else:
+            self.log("Beat snapping enabled")
+    
     def on_channel_canvas_click(self, event, channel_num):
         """Handle clicks on a virtual channel canvas"""
         canvas_widget = self.channel_canvases[channel_num - 1]  # Fix: use correct canvas reference
@@ -1489,13 +1667,24 @@ class SerialTerminal:
                 self.dragging_color_block['start_time'] = new_start
                 self.dragging_color_block['end_time'] = new_end
         
+        self.edge_index.update_block(self.dragging_color_block)
         self.drag_start_x = canvas_x
-        self.draw_virtual_channels()
+        
+        # Only the dragged block's items move; transition buttons on this channel
+        # are stale until the drag ends and are rebuilt on release
+        if not self.drag_moved:
+            self.drag_moved = True
+            canvas_widget.delete("transition")
+            self.transition_buttons.pop(f"channel_{channel_num}", None)
+        self.update_color_block_items(canvas_widget, self.dragging_color_block)
     
     def on_channel_canvas_release(self, event, channel_num):
         """Handle mouse release on virtual channel canvas"""
         self.dragging_color_block = None
         self.dragging_resize = None
+        if self.drag_moved:
+            self.drag_moved = False
+            self.draw_virtual_channels()
     
     def on_color_drop(self, event, channel_num):
         """Handle color drop onto a virtual channel"""
@@ -1517,7 +1706,7 @@ class SerialTerminal:
         
         # Add to the channel
         channel_key = f"channel_{channel_num}"
-        self.virtual_channels[channel_key].append(new_color_block)
+        self.add_color_block(channel_key, new_color_block)
         
         # Update display
         self.draw_virtual_channels()
@@ -1601,26 +1790,23 @@ class SerialTerminal:
         # Sort actions by start time
         sorted_actions = sorted(self.action_blocks, key=lambda x: x['start_time'])
         
-        # Start audio playback
-        self.start_playback()
-        
-        # Schedule actions
+        # Compile every action up front; the show scheduler thread sends them against the playback clock
+        commands = []
         for action in sorted_actions:
-            delay_ms = int(action['start_time'] * 1000)
             action_duration_ms = int((action['end_time'] - action['start_time']) * 1000)
-            
-            # Schedule action execution
-            self.timeline_window.after(delay_ms, lambda aid=action['action_id'], dur=action_duration_ms: self.execute_single_action(aid, dur))
+            commands.append((action['start_time'],) + self.compile_action(action['action_id'], action_duration_ms))
+        self.load_show(commands)
+        
+        # Start audio playback
+        self.start_playback()
         
         self.log(f"Executing {len(sorted_actions)} actions synchronized with audio")
     
-    def execute_single_action(self, action_id, duration_ms):
-        """Execute a single lighting action"""
-        if self.connected:
-            # Create lighting command (adjust based on your system's command format)
-            cmd = f'<LIGHTING.ON({{"CH": [-1], "Function": "Action", "Config": {{"action_id": {action_id}, "duration": {duration_ms}}}}})'
-            self.send_raw(cmd)
-            self.log(f"Executed Action {action_id} for {duration_ms}ms")
+    def compile_action(self, action_id, duration_ms):
+        """Build the command for a single lighting action, returns (command, description)"""
+        # Create lighting command (adjust based on your system's command format)
+        cmd = f'<LIGHTING.ON({{"CH": [-1], "Function": "Action", "Config": {{"action_id": {action_id}, "duration": {duration_ms}}}}})'
+        return cmd, f"Action {action_id} for {duration_ms}ms"
     
     def delete_selected_action(self):
         """Delete the currently selected action"""
@@ -1761,8 +1947,12 @@ class SerialTerminal:
         self.timeline_window.destroy()
         
         # Clear audio data
+        if self.audio_loader:
+            self.audio_loader.cancel()
+            self.audio_loader = None
         self.audio_file_path = None
-        self.audio_data = None
+        self.peak_pyramid = None
+        self.snap_targets = None
         self.audio_duration = 0
         self.playback_position = 0.0
         self.waveform_drawn = False
@@ -1799,7 +1989,7 @@ class SerialTerminal:
                     transition_x - button_size // 2, 25,
                     transition_x + button_size // 2, 35,
                     fill="#FFD700", outline="#FF8C00", width=2,
-                    tags=f"transition_btn_{channel_num}_{i}"
+                    tags=(f"transition_btn_{channel_num}_{i}", "transition")
                 )
                 
                 # Get current transition type
@@ -1811,7 +2001,7 @@ class SerialTerminal:
                 text_item = canvas.create_text(
                     transition_x, 30,
                     text=symbol, fill="black", font=("Arial", 8, "bold"),
-                    tags=f"transition_text_{channel_num}_{i}"
+                    tags=(f"transition_text_{channel_num}_{i}", "transition")
                 )
                 
                 # Store transition button info
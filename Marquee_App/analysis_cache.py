@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import numpy as np
+from waveform_peaks import PeakPyramid
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "haven_marquee", "audio")
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Hash of the file contents, so renamed or copied tracks still hit the cache"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Per-track analysis results on disk, keyed by a hash of the audio file contents
+
+    Each entry is a directory holding meta.json plus one .npy file per array.
+    Arrays are opened memory-mapped, so reopening a known track only touches
+    the pages that actually get drawn. Files are written to a temporary name
+    and renamed into place, and meta.json is written last, so an interrupted
+    save never leaves an entry that looks complete.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load_meta(self, key):
+        """Return the metadata dict of an entry, or None if it is missing or stale"""
+        try:
+            with open(os.path.join(self.entry_dir(key), 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == CACHE_VERSION else None
+
+    def save_meta(self, key, **values):
+        """Merge values into the metadata of an entry"""
+        meta = self.load_meta(key) or {'version': CACHE_VERSION}
+        meta.update(values)
+        path = os.path.join(self.entry_dir(key), 'meta.json')
+        os.makedirs(self.entry_dir(key), exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def load_array(self, key, name):
+        """Open a cached array read-only and memory-mapped, or return None"""
+        try:
+            return np.load(os.path.join(self.entry_dir(key), f'{name}.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    def save_array(self, key, name, array):
+        path = os.path.join(self.entry_dir(key), f'{name}.npy')
+        os.makedirs(self.entry_dir(key), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(path + '.tmp', path)
+
+    def load_pyramid(self, key):
+        """Rebuild a PeakPyramid whose levels are views into the memory-mapped peak arrays"""
+        meta = self.load_meta(key)
+        if not meta or 'level_lengths' not in meta:
+            return None
+        all_mins = self.load_array(key, 'peaks_min')
+        all_maxs = self.load_array(key, 'peaks_max')
+        if all_mins is None or all_maxs is None or len(all_mins) != sum(meta['level_lengths']):
+            return None
+        mins, maxs = [], []
+        offset = 0
+        for length in meta['level_lengths']:
+            mins.append(all_mins[offset:offset + length])
+            maxs.append(all_maxs[offset:offset + length])
+            offset += length
+        return PeakPyramid(mins, maxs, meta['base_bucket'], meta['sample_rate'], meta['num_samples'])
+
+    def save_pyramid(self, key, pyramid):
+        """Store every level of a pyramid back to back in two arrays"""
+        empty = np.empty(0, dtype=np.float32)
+        self.save_array(key, 'peaks_min', np.concatenate(pyramid.mins) if pyramid.mins else empty)
+        self.save_array(key, 'peaks_max', np.concatenate(pyramid.maxs) if pyramid.maxs else empty)
+        self.save_meta(key, level_lengths=[len(level) for level in pyramid.mins],
+                       base_bucket=pyramid.base_bucket, sample_rate=pyramid.sample_rate,
+                       num_samples=pyramid.num_samples, duration=pyramid.duration)
+
+    def load_events(self, key):
+        """Return the cached beat/onset arrays as {name: memmap}, or None if not analyzed yet"""
+        meta = self.load_meta(key)
+        if not meta or 'events' not in meta:
+            return None
+        events = {}
+        for name in meta['events']:
+            times = self.load_array(key, name)
+            if times is None:
+                return None
+            events[name] = times
+        return events
+
+    def save_events(self, key, events):
+        for name, times in events.items():
+            self.save_array(key, name, np.asarray(times, dtype=np.float64))
+        self.save_meta(key, events=sorted(events))
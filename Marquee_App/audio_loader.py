@@ -0,0 +1,119 @@
+import threading
+import time
+from queue import Queue
+import librosa
+import soundfile
+from analysis_cache import file_hash
+from beat_analysis import analyze_file
+from waveform_peaks import PeakPyramid, PeakPyramidBuilder
+
+FRAME_LENGTH = 4096
+BLOCK_FRAMES = 64          # 262144 samples (~6 s at 44.1 kHz) per decoded chunk
+PREVIEW_INTERVAL = 0.5     # Seconds between preview pyramids sent to the UI
+
+
+class AudioLoader:
+    """Decode an audio file and build its peak pyramid on a worker thread
+
+    The samples are streamed chunk by chunk and only their peaks are kept. The
+    UI drains self.messages from the Tk main thread; each message is a tuple:
+
+        ('progress', fraction, preview, duration)  preview is a PeakPyramid or None
+        ('done', pyramid)
+        ('error', message)
+        ('events', {kind: times})                  beats/downbeats/onsets, after 'done'
+        ('events_error', message)
+
+    Formats soundfile cannot stream are decoded in one go with librosa.load,
+    without progress or previews. With an AnalysisCache, a file whose contents
+    were decoded before is not decoded again, and neither is its beat analysis.
+    """
+
+    def __init__(self, file_path, cache=None):
+        self.file_path = file_path
+        self.cache = cache
+        self.content_key = None
+        self.from_cache = False
+        self.messages = Queue()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        """Stop decoding at the next chunk; no further messages are sent"""
+        self.stop_event.set()
+
+    @property
+    def cancelled(self):
+        return self.stop_event.is_set()
+
+    def _run(self):
+        try:
+            pyramid = None
+            if self.cache:
+                self.content_key = file_hash(self.file_path)
+                pyramid = self.cache.load_pyramid(self.content_key)
+                self.from_cache = pyramid is not None
+            if pyramid is None:
+                pyramid = self._load()
+                if pyramid is not None and self.cache:
+                    self._store(pyramid)
+            if pyramid is None or self.cancelled:
+                return
+            self.messages.put(('done', pyramid))
+        except Exception as e:
+            if not self.cancelled:
+                self.messages.put(('error', str(e)))
+            return
+
+        # The timeline is usable by now; beat tracking is a slower second pass
+        try:
+            events = self.cache.load_events(self.content_key) if self.cache else None
+            if events is None:
+                events = analyze_file(self.file_path)
+                if self.cache:
+                    try:
+                        self.cache.save_events(self.content_key, events)
+                    except OSError:
+                        pass
+            if not self.cancelled:
+                self.messages.put(('events', events))
+        except Exception as e:
+            if not self.cancelled:
+                self.messages.put(('events_error', str(e)))
+
+    def _store(self, pyramid):
+        try:
+            self.cache.save_pyramid(self.content_key, pyramid)
+        except OSError:
+            pass  # The cache only saves time, a read-only or full disk must not fail the load
+
+    def _load(self):
+        try:
+            info = soundfile.info(self.file_path)
+        except Exception:
+            # soundfile can't read this format (e.g. MP3 on older libsndfile), use librosa's fallback decoders
+            samples, sample_rate = librosa.load(self.file_path, sr=None)
+            return PeakPyramid.from_samples(samples, sample_rate)
+
+        sample_rate = info.samplerate
+        total_samples = max(1, info.frames)
+        duration = info.frames / sample_rate
+        builder = PeakPyramidBuilder(sample_rate)
+        stream = librosa.stream(self.file_path, block_length=BLOCK_FRAMES,
+                                frame_length=FRAME_LENGTH, hop_length=FRAME_LENGTH, mono=True)
+        last_preview = None
+        for block in stream:
+            if self.cancelled:
+                return None
+            builder.add(block)
+            fraction = min(1.0, builder.num_samples / total_samples)
+            preview = None
+            now = time.monotonic()
+            if last_preview is None or now - last_preview >= PREVIEW_INTERVAL:
+                preview = builder.build()
+                last_preview = now
+            self.messages.put(('progress', fraction, preview, duration))
+        return builder.build()
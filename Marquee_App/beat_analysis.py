@@ -0,0 +1,36 @@
+import librosa
+import numpy as np
+
+ANALYSIS_RATE = 22050   # Beat tracking doesn't need more, and halves the decode memory
+HOP_LENGTH = 512
+BEATS_PER_BAR = 4
+EVENT_KINDS = ('downbeats', 'beats', 'onsets')
+
+
+def analyze_file(file_path):
+    """Decode a file at the analysis rate and return its musical event times"""
+    samples, sample_rate = librosa.load(file_path, sr=ANALYSIS_RATE, mono=True)
+    return analyze_samples(samples, sample_rate)
+
+
+def analyze_samples(samples, sample_rate):
+    """Return {'downbeats', 'beats', 'onsets'} as sorted float64 arrays of seconds
+
+    librosa has no downbeat tracker, so bars are assumed to be BEATS_PER_BAR
+    beats long and start on the beat phase with the strongest onsets.
+    """
+    envelope = librosa.onset.onset_strength(y=samples, sr=sample_rate, hop_length=HOP_LENGTH)
+    _, beat_frames = librosa.beat.beat_track(onset_envelope=envelope, sr=sample_rate, hop_length=HOP_LENGTH)
+    onset_frames = librosa.onset.onset_detect(onset_envelope=envelope, sr=sample_rate, hop_length=HOP_LENGTH)
+    beat_frames = np.asarray(beat_frames, dtype=np.int64)
+
+    downbeat_frames = beat_frames[:0]
+    if len(beat_frames):
+        strength = envelope[np.minimum(beat_frames, len(envelope) - 1)]
+        phase = int(np.argmax([strength[p::BEATS_PER_BAR].sum() for p in range(BEATS_PER_BAR)]))
+        downbeat_frames = beat_frames[phase::BEATS_PER_BAR]
+
+    def to_time(frames):
+        return np.sort(librosa.frames_to_time(frames, sr=sample_rate, hop_length=HOP_LENGTH).astype(np.float64))
+
+    return {'downbeats': to_time(downbeat_frames), 'beats': to_time(beat_frames), 'onsets': to_time(onset_frames)}
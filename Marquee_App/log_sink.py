@@ -0,0 +1,57 @@
+import tkinter as tk
+import threading
+from collections import deque
+
+
+class TkLogSink:
+    """Thread-safe log buffer that feeds a Tk text widget once per UI tick
+
+    write() may be called from any thread; it only appends to a bounded deque.
+    A Tk after() loop on the main thread moves everything pending into the
+    widget with a single insert and trims the widget to the newest max_lines
+    lines, so a flooding device cannot stall the GUI or grow it forever.
+    """
+
+    def __init__(self, root, text_widget, max_lines=5000, interval_ms=50):
+        self.root = root
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        self.pending = deque(maxlen=max_lines)  # Older unflushed lines would be trimmed anyway
+        self.lock = threading.Lock()
+        self.job = self.root.after(self.interval_ms, self._tick)
+
+    def write(self, line):
+        """Queue one line (without trailing newline) for the widget"""
+        with self.lock:
+            self.pending.append(line)
+
+    def flush(self):
+        """Move pending lines into the widget now; must run on the Tk main thread"""
+        with self.lock:
+            if not self.pending:
+                return
+            lines = list(self.pending)
+            self.pending.clear()
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, "\n".join(lines) + "\n")
+        # The widget always ends with one empty line after the last newline
+        excess = int(self.text.index("end-1c").split(".")[0]) - 1 - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        self.text.see(tk.END)
+        self.text.config(state=tk.DISABLED)
+
+    def _tick(self):
+        try:
+            self.flush()
+        except tk.TclError:
+            # Widget is gone, stop flushing
+            self.job = None
+            return
+        self.job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self.job:
+            self.root.after_cancel(self.job)
+            self.job = None
@@ -0,0 +1,107 @@
+import threading
+import time
+
+DRIFT_TOLERANCE = 0.03  # Seconds the clock may run away from the audio device before it is re-anchored
+
+
+class PlaybackClock:
+    """Playback position in seconds, anchored at play/seek on a monotonic clock
+
+    The monotonic clock gives a smooth position between audio buffer updates.
+    get_audio_ms (pygame.mixer.music.get_pos: milliseconds of audio played
+    since play(), unaffected by set_pos) is the device's own view; sample_drift()
+    compares the two and re-anchors the clock once they differ by more than
+    DRIFT_TOLERANCE, so long tracks can't slowly walk away from the audio.
+    position() is safe to call from any thread.
+    """
+
+    def __init__(self, get_audio_ms=None, drift_tolerance=DRIFT_TOLERANCE):
+        self.get_audio_ms = get_audio_ms
+        self.drift_tolerance = drift_tolerance
+        self.lock = threading.Lock()
+        self.running = False
+        self.anchor_time = time.monotonic()
+        self.anchor_position = 0.0
+        self.audio_anchor_ms = None
+        self.audio_anchor_position = 0.0
+        self.reset_drift()
+
+    def _audio_ms(self):
+        if self.get_audio_ms is None:
+            return None
+        try:
+            ms = self.get_audio_ms()
+        except Exception:
+            return None
+        return ms if ms >= 0 else None
+
+    def _anchor(self, position):
+        self.anchor_time = time.monotonic()
+        self.anchor_position = position
+        self.audio_anchor_ms = self._audio_ms() if self.running else None
+        self.audio_anchor_position = position
+
+    def start(self, position):
+        """Call right after the audio starts playing from position"""
+        with self.lock:
+            self.running = True
+            self._anchor(position)
+
+    def pause(self):
+        """Freeze the clock at the current position"""
+        with self.lock:
+            position = self._position()
+            self.running = False
+            self._anchor(position)
+
+    def seek(self, position):
+        with self.lock:
+            self._anchor(position)
+
+    def _position(self):
+        if not self.running:
+            return self.anchor_position
+        return self.anchor_position + time.monotonic() - self.anchor_time
+
+    def position(self):
+        with self.lock:
+            return self._position()
+
+    def audio_position(self):
+        """Position according to the audio device, or None if it can't be read"""
+        with self.lock:
+            if not self.running or self.audio_anchor_ms is None:
+                return None
+            ms = self._audio_ms()
+            if ms is None:
+                return None
+            return self.audio_anchor_position + (ms - self.audio_anchor_ms) / 1000.0
+
+    def sample_drift(self):
+        """Compare against the audio device, re-anchor if needed and return the drift in seconds"""
+        audio = self.audio_position()
+        if audio is None:
+            return None
+        with self.lock:
+            drift = self._position() - audio
+            self.drift_samples += 1
+            self.drift_total += abs(drift)
+            self.max_drift = max(self.max_drift, abs(drift))
+            if abs(drift) > self.drift_tolerance:
+                # Follow the device; the audio anchor stays put so later samples stay comparable
+                self.anchor_position -= drift
+                self.corrections += 1
+        return drift
+
+    def reset_drift(self):
+        self.drift_samples = 0
+        self.drift_total = 0.0
+        self.max_drift = 0.0
+        self.corrections = 0
+
+    def drift_summary(self):
+        if not self.drift_samples:
+            return "Playback clock drift: no audio position samples"
+        mean_ms = self.drift_total / self.drift_samples * 1000
+        return (f"Playback clock drift: mean {mean_ms:.1f} ms, max {self.max_drift * 1000:.1f} ms, "
+                f"{self.corrections} corrections over {self.drift_samples} samples")
@@ -0,0 +1,52 @@
+"""
+Event-driven serial line reader shared by the Haven tools.
+Blocks in a bulk read (CPU idles until bytes arrive or the timeout passes),
+splits lines incrementally from a bytearray and hands them over in batches.
+"""
+
+DEFAULT_READ_TIMEOUT = 0.1
+MAX_LINE_BYTES = 64 * 1024
+
+
+class LineSplitter:
+    """Accumulate raw serial bytes and return the complete lines they contain"""
+
+    def __init__(self, encoding='utf-8', max_line=MAX_LINE_BYTES):
+        self.encoding = encoding
+        self.max_line = max_line
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add bytes and return the newly completed non-empty lines, stripped"""
+        self.buffer += data
+        end = self.buffer.rfind(b'\n')
+        if end < 0:
+            if len(self.buffer) < self.max_line:
+                return []
+            # No newline in sight, don't let a runaway line grow forever
+            end = len(self.buffer) - 1
+        complete = bytes(self.buffer[:end + 1])
+        del self.buffer[:end + 1]
+        text = complete.decode(self.encoding, errors='ignore')
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def read_line_batches(ser, running, timeout=DEFAULT_READ_TIMEOUT):
+    """Yield lists of lines read from an open serial port while running() is true
+
+    Each pass blocks for the first byte (up to timeout seconds, which is set on
+    the port) and then takes everything else already buffered in one read.
+    Serial exceptions propagate to the caller.
+    """
+    ser.timeout = timeout
+    splitter = LineSplitter()
+    while running() and ser.is_open:
+        chunk = ser.read(1)
+        if not chunk:
+            continue
+        waiting = ser.in_waiting
+        if waiting:
+            chunk += ser.read(waiting)
+        lines = splitter.feed(chunk)
+        if lines:
+            yield lines
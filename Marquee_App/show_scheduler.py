@@ -0,0 +1,129 @@
+import heapq
+import threading
+import time
+
+SPIN_THRESHOLD = 0.002  # Below this the thread sleeps in tiny steps instead of waiting on the condition
+MAX_WAIT = 0.05         # Re-read the clock at least this often, it can be re-anchored under us
+
+
+class ShowScheduler:
+    """Dispatch compiled show commands on a dedicated thread, timed against a PlaybackClock
+
+    load() takes (start_time, command, description) tuples. Pending commands
+    live in a heap ordered by start time; the thread waits on a condition until
+    the next one is almost due and finishes with short sleeps, so timing does
+    not depend on how busy the Tk event loop is. send(command, description,
+    late) runs on the scheduler thread; late is how far after its start time
+    the command went out, in seconds (negative when early).
+    """
+
+    def __init__(self, clock, send, spin_threshold=SPIN_THRESHOLD):
+        self.clock = clock
+        self.send = send
+        self.spin_threshold = spin_threshold
+        self.condition = threading.Condition()
+        self.commands = []   # Everything loaded, sorted, for rebuilding the heap on seek
+        self.heap = []
+        self.sequence = 0
+        self.paused = True
+        self.running = True
+        self.lateness = []
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def load(self, commands, position=0.0):
+        """Replace the show with new commands and queue those at or after position"""
+        with self.condition:
+            self.commands = sorted(
+                ((start_time, index, command, description)
+                 for index, (start_time, command, description) in enumerate(commands)),
+                key=lambda entry: (entry[0], entry[1]))
+            self.lateness = []
+            self._queue_from(position)
+            self.condition.notify()
+
+    def _queue_from(self, position):
+        self.heap = [entry for entry in self.commands if entry[0] >= position]
+        heapq.heapify(self.heap)
+
+    def resume(self):
+        with self.condition:
+            self.paused = False
+            self.condition.notify()
+
+    def pause(self):
+        with self.condition:
+            self.paused = True
+            self.condition.notify()
+
+    def seek(self, position):
+        """Drop what is queued and continue with the commands at or after position"""
+        with self.condition:
+            self._queue_from(position)
+            self.condition.notify()
+
+    def stop(self):
+        """Drop every pending command; the show has to be loaded again"""
+        with self.condition:
+            self.paused = True
+            self.heap = []
+            self.commands = []
+            self.condition.notify()
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(timeout=1.0)
+
+    @property
+    def pending(self):
+        with self.condition:
+            return len(self.heap)
+
+    def _next_due(self):
+        """Wait until the next command is due and pop it, or return None when shutting down"""
+        with self.condition:
+            while self.running:
+                if self.paused or not self.heap:
+                    self.condition.wait()
+                    continue
+                remaining = self.heap[0][0] - self.clock.position()
+                if remaining > self.spin_threshold:
+                    # Wakes early on pause/seek/stop; the clock is re-read every time round
+                    self.condition.wait(min(remaining - self.spin_threshold, MAX_WAIT))
+                    continue
+                if remaining > 0:
+                    # Last couple of milliseconds: sleep outside the lock in tiny steps
+                    self.condition.release()
+                    try:
+                        time.sleep(min(remaining, 0.0005))
+                    finally:
+                        self.condition.acquire()
+                    continue
+                return heapq.heappop(self.heap)
+        return None
+
+    def _run(self):
+        while True:
+            entry = self._next_due()
+            if entry is None:
+                return
+            start_time, _, command, description = entry
+            late = self.clock.position() - start_time
+            with self.condition:
+                self.lateness.append(late)
+            try:
+                self.send(command, description, late)
+            except Exception:
+                pass  # A failed write must not kill the show thread; send reports its own errors
+
+    def jitter_summary(self):
+        with self.condition:
+            lateness = sorted(abs(late) for late in self.lateness)
+        if not lateness:
+            return "Show dispatch: no commands sent"
+        mean_ms = sum(lateness) / len(lateness) * 1000
+        p95_ms = lateness[min(len(lateness) - 1, int(len(lateness) * 0.95))] * 1000
+        return (f"Show dispatch jitter over {len(lateness)} commands: mean {mean_ms:.2f} ms, "
+                f"p95 {p95_ms:.2f} ms, max {lateness[-1] * 1000:.2f} ms")
@@ -0,0 +1,124 @@
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+
+class SnapTargets:
+    """Sorted musical event times that color blocks can snap to
+
+    Each kind of event is one sorted array, so the nearest event is a binary
+    search per kind instead of a scan over the whole track.
+    """
+
+    # Checked in this order, so a downbeat wins over a beat or onset at the same distance
+    LABELS = {'downbeats': 'Downbeat', 'beats': 'Beat', 'onsets': 'Onset'}
+
+    def __init__(self, events):
+        self.events = {}
+        for kind in self.LABELS:
+            times = events.get(kind)
+            if times is not None and len(times):
+                self.events[kind] = np.sort(np.asarray(times, dtype=np.float64))
+
+    def __len__(self):
+        return sum(len(times) for times in self.events.values())
+
+    def nearest(self, target_time, threshold):
+        """Return (time, label) of the closest event within threshold, or None"""
+        best = None
+        best_distance = threshold
+        for kind, times in self.events.items():
+            index = int(np.searchsorted(times, target_time))
+            for candidate in (index - 1, index):
+                if 0 <= candidate < len(times):
+                    distance = abs(times[candidate] - target_time)
+                    if distance < best_distance:
+                        best_distance = distance
+                        best = (float(times[candidate]), self.LABELS[kind])
+        return best
+
+
+class EdgeIndex:
+    """Sorted start/end times of every color block across all channels
+
+    Kept up to date as blocks are added, moved, resized and deleted, so the
+    nearest edge to a drag position is a binary search plus a step or two
+    past the block being dragged, whatever the size of the show.
+    """
+
+    def __init__(self):
+        self.times = []
+        self.owners = []   # (id(block), channel_key, 'start' | 'end'), parallel to times
+        self.blocks = {}   # id(block) -> (channel_key, start_time, end_time) as indexed
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def clear(self):
+        self.times = []
+        self.owners = []
+        self.blocks = {}
+
+    def rebuild(self, virtual_channels):
+        self.clear()
+        for channel_key, color_blocks in virtual_channels.items():
+            for color_block in color_blocks:
+                self.add_block(channel_key, color_block)
+
+    def _insert(self, edge_time, owner):
+        index = bisect_right(self.times, edge_time)
+        self.times.insert(index, edge_time)
+        self.owners.insert(index, owner)
+
+    def _delete(self, edge_time, owner):
+        index = bisect_left(self.times, edge_time)
+        while index < len(self.times) and self.times[index] == edge_time:
+            if self.owners[index] == owner:
+                del self.times[index]
+                del self.owners[index]
+                return
+            index += 1
+
+    def add_block(self, channel_key, color_block):
+        block_id = id(color_block)
+        start, end = color_block['start_time'], color_block['end_time']
+        self.blocks[block_id] = (channel_key, start, end)
+        self._insert(start, (block_id, channel_key, 'start'))
+        self._insert(end, (block_id, channel_key, 'end'))
+
+    def remove_block(self, color_block):
+        block_id = id(color_block)
+        entry = self.blocks.pop(block_id, None)
+        if entry:
+            channel_key, start, end = entry
+            self._delete(start, (block_id, channel_key, 'start'))
+            self._delete(end, (block_id, channel_key, 'end'))
+
+    def update_block(self, color_block):
+        """Re-index a block after its start or end time changed"""
+        entry = self.blocks.get(id(color_block))
+        if not entry:
+            return
+        if (entry[1], entry[2]) != (color_block['start_time'], color_block['end_time']):
+            self.remove_block(color_block)
+            self.add_block(entry[0], color_block)
+
+    def nearest(self, target_time, threshold, exclude=None):
+        """Return (time, channel_key, edge_type) of the closest edge within threshold, or None
+
+        Edges of the exclude block (usually the one being dragged) are skipped.
+        """
+        skip = id(exclude) if exclude is not None else None
+        best = None
+        best_distance = threshold
+        index = bisect_left(self.times, target_time)
+        for position, step in ((index - 1, -1), (index, 1)):
+            while 0 <= position < len(self.times):
+                distance = abs(self.times[position] - target_time)
+                if distance >= best_distance:
+                    break
+                if self.owners[position][0] != skip:
+                    best_distance = distance
+                    best = (self.times[position], self.owners[position][1], self.owners[position][2])
+                    break
+                position += step
+        return best
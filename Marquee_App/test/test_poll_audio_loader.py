@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+from queue import Queue
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MarqueeApp
+from MarqueeApp import SerialTerminal
+
+
+def make_pyramid(duration):
+    return SimpleNamespace(sample_rate=44100, duration=duration)
+
+
+class PollAudioLoaderTest(unittest.TestCase):
+    def setUp(self):
+        # Only the state poll_audio_loader and finish_audio_load touch, no Tk window
+        self.app = object.__new__(SerialTerminal)
+        self.app.root = mock.Mock()
+        self.app.audio_file_label = mock.Mock()
+        self.app.timeline_info_label = mock.Mock()
+        self.app.play_button = mock.Mock()
+        self.app.peak_pyramid = None
+        self.app.audio_duration = 0.0
+        self.app.draw_waveform = mock.Mock()
+        self.app.draw_waveform_view = mock.Mock()
+        self.app.log = mock.Mock()
+        self.loader = SimpleNamespace(file_path="/music/song.wav", from_cache=False,
+                                      cancelled=False, messages=Queue())
+        self.app.audio_loader = self.loader
+
+    def poll(self):
+        with mock.patch.object(MarqueeApp.pygame.mixer.music, "load"):
+            self.app.poll_audio_loader(self.loader)
+
+    def test_preview_is_shown_while_loading(self):
+        partial = make_pyramid(30.0)
+        self.loader.messages.put(('progress', 0.5, partial, 30.0))
+        self.poll()
+
+        self.assertIs(self.app.peak_pyramid, partial)
+        self.assertEqual(self.app.audio_duration, 30.0)
+        self.app.draw_waveform.assert_called_once()
+
+    def test_done_in_same_batch_replaces_preview(self):
+        partial = make_pyramid(30.0)
+        full = make_pyramid(180.0)
+        self.loader.messages.put(('progress', 0.5, partial, 30.0))
+        self.loader.messages.put(('done', full))
+        self.poll()
+
+        self.assertIs(self.app.peak_pyramid, full)
+        self.assertEqual(self.app.audio_duration, 180.0)
+        self.app.draw_waveform_view.assert_not_called()
+        # Still polling for the beat analysis
+        self.app.root.after.assert_called_once_with(100, self.app.poll_audio_loader, self.loader)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import numpy as np
+
+DEFAULT_BASE_BUCKET = 32  # Samples per bucket at the finest level
+
+
+class PeakPyramid:
+    """Min/max peaks of an audio signal at power-of-two bucket sizes
+
+    Level k holds the min and max of every block of base_bucket * 2**k samples,
+    so any zoom level can be drawn by reducing a slice of the nearest finer level
+    instead of rescanning the raw samples.
+    """
+
+    def __init__(self, mins, maxs, base_bucket, sample_rate, num_samples):
+        self.mins = mins  # List of float32 arrays, finest level first
+        self.maxs = maxs
+        self.base_bucket = base_bucket
+        self.sample_rate = sample_rate
+        self.num_samples = num_samples
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate, base_bucket=DEFAULT_BASE_BUCKET):
+        """Build every level from a mono sample array"""
+        builder = PeakPyramidBuilder(sample_rate, base_bucket)
+        builder.add(samples)
+        return builder.build()
+
+    @classmethod
+    def from_base_level(cls, level_min, level_max, base_bucket, sample_rate, num_samples):
+        """Build the coarser levels on top of the finest one"""
+        mins, maxs = [], []
+        if len(level_min):
+            mins.append(level_min)
+            maxs.append(level_max)
+            while len(level_min) > 1:
+                if len(level_min) % 2:
+                    level_min = np.append(level_min, level_min[-1])
+                    level_max = np.append(level_max, level_max[-1])
+                level_min = np.minimum(level_min[0::2], level_min[1::2])
+                level_max = np.maximum(level_max[0::2], level_max[1::2])
+                mins.append(level_min)
+                maxs.append(level_max)
+        return cls(mins, maxs, base_bucket, sample_rate, num_samples)
+
+    @property
+    def duration(self):
+        return self.num_samples / self.sample_rate if self.sample_rate else 0
+
+    def bucket_size(self, level):
+        return self.base_bucket << level
+
+    def level_for(self, samples_per_pixel):
+        """Coarsest level whose buckets are no wider than one pixel"""
+        level = 0
+        while level + 1 < len(self.mins) and self.bucket_size(level + 1) <= samples_per_pixel:
+            level += 1
+        return level
+
+    def peaks(self, start_time, seconds_per_pixel, count):
+        """Return (mins, maxs) for count pixel columns starting at start_time
+
+        Columns past the end of the audio come back as zeros.
+        """
+        out_min = np.zeros(count, dtype=np.float32)
+        out_max = np.zeros(count, dtype=np.float32)
+        if not self.mins or count <= 0:
+            return out_min, out_max
+        samples_per_pixel = seconds_per_pixel * self.sample_rate
+        level = self.level_for(samples_per_pixel)
+        bucket = self.bucket_size(level)
+        level_min, level_max = self.mins[level], self.maxs[level]
+
+        # Bucket index where each column starts; every column covers at least one bucket
+        edges = ((start_time * self.sample_rate + np.arange(count + 1) * samples_per_pixel) / bucket).astype(np.int64)
+        valid = np.flatnonzero((edges[:-1] >= 0) & (edges[:-1] < len(level_min)))
+        if not valid.size:
+            return out_min, out_max
+        starts = edges[valid]
+        first = starts[0]
+        end = min(len(level_min), max(starts[-1] + 1, edges[valid[-1] + 1]))
+        # reduceat reduces seg[starts[i]:starts[i + 1]] (just seg[starts[i]] when they are equal)
+        # and the last column up to the end of the slice
+        out_min[valid] = np.minimum.reduceat(level_min[first:end], starts - first)
+        out_max[valid] = np.maximum.reduceat(level_max[first:end], starts - first)
+        return out_min, out_max
+
+
+class PeakPyramidBuilder:
+    """Accumulate finest-level peaks from decoded chunks without keeping the samples
+
+    A partial bucket at the end of a chunk is carried over into the next one, so
+    feeding a file chunk by chunk gives the same pyramid as from_samples on the
+    whole signal. build() can be called at any time for a preview.
+    """
+
+    def __init__(self, sample_rate, base_bucket=DEFAULT_BASE_BUCKET):
+        self.sample_rate = sample_rate
+        self.base_bucket = base_bucket
+        self.num_samples = 0
+        self.mins = []
+        self.maxs = []
+        self.carry = np.empty(0, dtype=np.float32)
+
+    def add(self, chunk):
+        """Add the next mono chunk of samples"""
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self.num_samples += len(chunk)
+        if len(self.carry):
+            chunk = np.concatenate((self.carry, chunk))
+        full = len(chunk) // self.base_bucket
+        if full:
+            blocks = chunk[:full * self.base_bucket].reshape(full, self.base_bucket)
+            self.mins.append(blocks.min(axis=1))
+            self.maxs.append(blocks.max(axis=1))
+        self.carry = chunk[full * self.base_bucket:].copy()
+
+    def build(self):
+        """Return a PeakPyramid of everything added so far"""
+        mins, maxs = list(self.mins), list(self.maxs)
+        if len(self.carry):
+            mins.append(self.carry.min(keepdims=True))
+            maxs.append(self.carry.max(keepdims=True))
+        if mins:
+            level_min, level_max = np.concatenate(mins), np.concatenate(maxs)
+        else:
+            level_min = level_max = np.empty(0, dtype=np.float32)
+        return PeakPyramid.from_base_level(level_min, level_max, self.base_bucket, self.sample_rate, self.num_samples)
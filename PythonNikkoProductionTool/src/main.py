@@ -23,6 +23,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer, QRect, QSize, QPropertyAnimation
 from PyQt5.QtGui import QFont, QColor, QPixmap, QIcon, QTextCursor
+from serial_reader import read_line_batches
 
 # =============================================================================
 # HELPER FUNCTIONS
@@ -251,10 +252,11 @@ class WatchdogThread(QThread):
 
 class SerialReaderThread(QThread):
     """
-    Continuously reads data from a serial port and emits received lines.
-    Runs in a loop until stopped, handling read errors gracefully.
+    Continuously reads data from a serial port and emits received lines in batches.
+    Blocks in bulk reads with a short timeout instead of polling, so it idles
+    while the device is quiet. Runs until stopped, handling read errors gracefully.
     """
-    data_received = pyqtSignal(str)
+    lines_received = pyqtSignal(list)
 
     def __init__(self, serial_port):
         super().__init__()
@@ -262,16 +264,11 @@ class SerialReaderThread(QThread):
         self.running = True
 
     def run(self):
-        while self.running and self.serial_port.is_open:
-            try:
-                if self.serial_port.in_waiting:
-                    data = self.serial_port.readline().decode('utf-8').strip()
-                    if data:
-                        self.data_received.emit(data)
-                time.sleep(0.01)
-            except Exception as e:
-                self.data_received.emit(f"Read error: {e}")
-                break
+        try:
+            for lines in read_line_batches(self.serial_port, lambda: self.running):
+                self.lines_received.emit(lines)
+        except Exception as e:
+            self.lines_received.emit([f"Read error: {e}"])
 
     def stop(self):
         self.running = False
@@ -343,7 +340,7 @@ class LiveTerminalDialog(QDialog):
         self.text_edit.setText(parent.persistent_log)
         self.text_edit.moveCursor(QTextCursor.End)
         if parent.ser and parent.ser.is_open and parent.reader_thread:
-            parent.reader_thread.data_received.connect(parent.display_text)
+            parent.reader_thread.lines_received.connect(parent.display_lines)
             parent.append_signal.connect(self.append_colored_text)
 
     def append_colored_text(self, text, color):
@@ -874,6 +871,13 @@ class SerialMonitorWindow(QMainWindow):
             with open(self.log_file, 'a', encoding='utf-8') as f:
                 f.write(text)
 
+    def display_lines(self, lines):
+        """
+        Handles a batch of lines from the serial reader thread, one display_text call per line.
+        """
+        for text in lines:
+            self.display_text(text)
+
     def display_text(self, text):
         """
         Processes incoming serial data: colors based on content type, appends to terminal,
@@ -1320,7 +1324,7 @@ class SerialMonitorWindow(QMainWindow):
         try:
             self.ser = serial.Serial(port, baud, timeout=1)
             self.reader_thread = SerialReaderThread(self.ser)
-            self.reader_thread.data_received.connect(self.display_text)
+            self.reader_thread.lines_received.connect(self.display_lines)
             self.reader_thread.start()
             self.append_text(f"Connected to {port} at {baud} baud\n", QColor("darkgray"))
             self.logging_enabled = True
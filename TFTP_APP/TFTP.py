@@ -3,12 +3,14 @@ from tkinter import filedialog, scrolledtext, messagebox, ttk
 from datetime import datetime
 import socket
 import threading
-import struct
 import os
 import queue
 import binascii
 import random
+import asyncio
 import time
+from tftp_engine import (TFTP_PORT, BLOCK_SIZE, TFTP_TIMEOUT, FLEET_CONCURRENCY, OP_WRQ, EngineThread, Session,
+                         TFTPServer, Upload, data_packet, fleet_summary, parse_targets, request_packet, upload_fleet)
 
 class ToolTip:
     """Create a tooltip for a given widget"""
@@ -84,12 +86,12 @@ class TFTPUDPApp:
         self.root.configure(bg='black')
         
         self.sending = False
-        self.abort_flag = False
-        self.tftp_sock = None
+        self.tftp_engine = EngineThread()  # Event loop that runs every upload
+        self.tftp_task = None
         self.tftp_msg_queue = queue.Queue()
         self.tftp_mode = "send"  # "send" or "listen"
         self.tftp_listening = False
-        self.tftp_listen_thread = None
+        self.tftp_listener = None  # TFTPServer while in listen mode
         self._stop_sending_flag = False
         
         # Top half: TFTP Panel
@@ -146,6 +148,15 @@ class TFTPUDPApp:
         self.normal_send_btn = tk.Button(btn_frame, text="TFTP Send", command=self.normal_send_tftp, bg='#00aa00', fg='white', relief='flat')
         self.normal_send_btn.pack(side=tk.LEFT, padx=5)
         
+        self.fleet_send_btn = tk.Button(btn_frame, text="Fleet Send", command=self.fleet_send_tftp, bg='#00aa00', fg='white', relief='flat')
+        self.fleet_send_btn.pack(side=tk.LEFT, padx=5)
+        self.create_tooltip(self.fleet_send_btn, "Sends the file to every address in Target IP (comma separated IPs and/or CIDR like 10.10.2.0/24) at once")
+        tk.Label(btn_frame, text="Parallel:", fg='white', bg='#2c2c2c').pack(side=tk.LEFT)
+        self.fleet_parallel = tk.Spinbox(btn_frame, from_=1, to=256, width=4, bg='#404040', fg='white', insertbackground='white')
+        self.fleet_parallel.pack(side=tk.LEFT, padx=5)
+        self.fleet_parallel.delete(0, tk.END)
+        self.fleet_parallel.insert(0, str(FLEET_CONCURRENCY))
+        
         # Failure simulation buttons - First row
         tk.Label(self.send_frame, text="Failure Simulations:", fg='#888888', bg='#2c2c2c', font=('Arial', 9)).pack(pady=(10, 2))
         
@@ -191,6 +202,7 @@ class TFTPUDPApp:
         self.output_entry = tk.Entry(output_frame, width=40, bg='#404040', fg='white', insertbackground='white', font=('Arial', 12))
         self.output_entry.pack(side=tk.LEFT, padx=5)
         self.output_entry.insert(0, "received.bin")
+        self.create_tooltip(self.output_entry, "Uploads are saved here (client address appended when several arrive at once); downloads are served from this file's folder")
         
         listen_btn_frame = tk.Frame(self.listen_frame, bg='#2c2c2c')
         listen_btn_frame.pack(pady=10)
@@ -356,14 +368,14 @@ class TFTPUDPApp:
             # Get IP from the display label (in listen mode)
             ip = self.ip_display.cget("text")
             filename = self.output_entry.get()
+            server = TFTPServer(filename, log=self.tftp_msg_queue.put)
             try:
-                self.tftp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                self.tftp_sock.bind((ip, 69))
+                # Wait for the bind here so a busy or privileged port is reported straight away
+                self.tftp_engine.submit(server.start(ip, TFTP_PORT)).result(timeout=5)
+                self.tftp_listener = server
                 self.tftp_listening = True
                 self.start_listen_btn.config(text="Stop Listen", bg='#ff0000')
-                self.tftp_listen_thread = threading.Thread(target=self.tftp_server, args=(filename,), daemon=True)
-                self.tftp_listen_thread.start()
-                self.tftp_msg_queue.put(f"Listening for TFTP on {ip}:69\n")
+                self.tftp_msg_queue.put(f"Listening for TFTP on {ip}:{TFTP_PORT} (uploads to {filename}, downloads from {server.root})\n")
                 
                 # Disable mode switching while listening
                 self.send_radio.config(state='disabled')
@@ -372,9 +384,9 @@ class TFTPUDPApp:
                 messagebox.showerror("Error", str(e))
         else:
             self.tftp_listening = False
-            if self.tftp_sock:
-                self.tftp_sock.close()
-                self.tftp_sock = None
+            if self.tftp_listener:
+                self.tftp_engine.submit(self.tftp_listener.stop())
+                self.tftp_listener = None
             self.start_listen_btn.config(text="Start Listen", bg='#1a1a1a')
             self.tftp_msg_queue.put("Stopped listening\n")
             
@@ -382,145 +394,6 @@ class TFTPUDPApp:
             self.send_radio.config(state='normal')
             self.listen_radio.config(state='normal')
     
-    def tftp_server(self, out_filename):
-        """TFTP server for receiving files"""
-        while self.tftp_listening:
-            try:
-                data, addr = self.tftp_sock.recvfrom(1024)
-                opcode = struct.unpack('!H', data[:2])[0]
-                if opcode == 2:  # WRQ
-                    # Parse filename and mode
-                    filename_end = data[2:].find(b'\0')
-                    filename_req = data[2:2 + filename_end].decode()
-                    mode_start = 2 + filename_end + 1
-                    mode_end_rel = data[mode_start:].find(b'\0')
-                    mode_end = mode_start + mode_end_rel
-                    mode = data[mode_start:mode_end].decode()
-                    
-                    self.tftp_msg_queue.put(f"WRQ from {addr}: {filename_req} ({mode})\n")
-                    
-                    # Parse options
-                    opt_data = data[mode_end + 1:]
-                    expected_size = None
-                    while len(opt_data) > 0:
-                        key_end = opt_data.find(b'\0')
-                        if key_end == -1:
-                            break
-                        key = opt_data[:key_end].decode()
-                        opt_data = opt_data[key_end + 1:]
-                        val_end = opt_data.find(b'\0')
-                        if val_end == -1:
-                            break
-                        val = opt_data[:val_end].decode()
-                        opt_data = opt_data[val_end + 1:]
-                        if key == 'size':
-                            expected_size = int(val)
-                    
-                    # Send OACK or ACK 0
-                    if expected_size is not None:
-                        oack = struct.pack('!H', 6) + b'size\0' + str(expected_size).encode() + b'\0'
-                        self.tftp_sock.sendto(oack, addr)
-                        self.tftp_msg_queue.put(f"Sent OACK with expected size {expected_size}\n")
-                    else:
-                        ack = struct.pack('!HH', 4, 0)
-                        self.tftp_sock.sendto(ack, addr)
-                    
-                    # Open file and receive
-                    total_received = 0
-                    expected_blocks = []
-                    received_blocks = []
-                    missing_blocks = []
-                    
-                    with open(out_filename, 'wb') as f:
-                        block_num = 1
-                        consecutive_missing = 0
-                        last_received_block = 0
-                        
-                        while self.tftp_listening:
-                            try:
-                                # Set a timeout for receiving packets
-                                self.tftp_sock.settimeout(5.0)
-                                data_pkt, addr_check = self.tftp_sock.recvfrom(1024)
-                                self.tftp_sock.settimeout(None)
-                            except socket.timeout:
-                                # Timeout waiting for packet - might be missing blocks
-                                if expected_size is not None and total_received < expected_size:
-                                    missing_bytes = expected_size - total_received
-                                    self.tftp_msg_queue.put(f"⚠️ TIMEOUT: Expected more data. Missing approximately {missing_bytes} bytes.\n")
-                                    self.tftp_msg_queue.put(f"⚠️ This file appears to be CORRUPTED - some packets were not received!\n")
-                                    self.tftp_msg_queue.put(f"⚠️ Please request the sender to send the file again.\n")
-                                break
-                                
-                            if addr_check != addr:
-                                continue
-                            pkt_opcode = struct.unpack('!H', data_pkt[:2])[0]
-                            if pkt_opcode != 3:  # DATA
-                                break
-                            block = struct.unpack('!H', data_pkt[2:4])[0]
-                            
-                            # Check for missing blocks
-                            if block != block_num:
-                                if block > block_num:
-                                    # We're missing some blocks
-                                    for missing in range(block_num, block):
-                                        missing_blocks.append(missing)
-                                        self.tftp_msg_queue.put(f"⚠️ MISSING BLOCK {missing}! Expected {block_num}, received {block}\n")
-                                    consecutive_missing = block - block_num
-                                    block_num = block
-                                else:
-                                    # Duplicate or out-of-order block
-                                    self.tftp_msg_queue.put(f"⚠️ Duplicate/out-of-order block {block}, expected {block_num}\n")
-                                    continue
-                            
-                            received_blocks.append(block)
-                            filedata = data_pkt[4:]
-                            f.write(filedata)
-                            total_received += len(filedata)
-                            last_received_block = block
-                            
-                            if missing_blocks:
-                                self.tftp_msg_queue.put(f"Received block {block_num} ({len(filedata)} bytes) - GAPS DETECTED\n")
-                            else:
-                                self.tftp_msg_queue.put(f"Received block {block_num}, {len(filedata)} bytes\n")
-                            
-                            # ACK
-                            ack_pkt = struct.pack('!HH', 4, block_num)
-                            self.tftp_sock.sendto(ack_pkt, addr)
-                            block_num += 1
-                            
-                            if len(filedata) < 512:
-                                break
-                    
-                    # Final corruption check
-                    if missing_blocks:
-                        self.tftp_msg_queue.put(f"\n🚨 FILE CORRUPTION DETECTED! 🚨\n")
-                        self.tftp_msg_queue.put(f"Missing blocks: {missing_blocks}\n")
-                        self.tftp_msg_queue.put(f"Missing approximately {len(missing_blocks) * 512} bytes of data.\n")
-                        self.tftp_msg_queue.put(f"⚠️ This file is CORRUPTED and should not be used!\n")
-                        self.tftp_msg_queue.put(f"⚠️ Please request the sender to resend the file.\n\n")
-                    
-                    # Check size if expected
-                    if expected_size is not None:
-                        if total_received != expected_size:
-                            missing_bytes = expected_size - total_received
-                            self.tftp_msg_queue.put(f"🚨 SIZE MISMATCH DETECTED! 🚨\n")
-                            self.tftp_msg_queue.put(f"Expected {expected_size} bytes, received {total_received} bytes\n")
-                            self.tftp_msg_queue.put(f"Missing {missing_bytes} bytes - FILE IS CORRUPTED!\n")
-                            self.tftp_msg_queue.put(f"⚠️ Please request the sender to send the file again.\n")
-                        else:
-                            if missing_blocks:
-                                self.tftp_msg_queue.put(f"File size matches expected ({total_received} bytes) but blocks are missing - FILE IS STILL CORRUPTED!\n")
-                            else:
-                                self.tftp_msg_queue.put(f"File received successfully: {out_filename} ({total_received} bytes, matches expected)\n")
-                    else:
-                        if missing_blocks:
-                            self.tftp_msg_queue.put(f"File received: {out_filename} ({total_received} bytes) - ⚠️ BUT CORRUPTED DUE TO MISSING BLOCKS!\n")
-                        else:
-                            self.tftp_msg_queue.put(f"File received: {out_filename} ({total_received} bytes)\n")
-            except Exception as e:
-                if self.tftp_listening:
-                    self.tftp_msg_queue.put(f"Error: {str(e)}\n")
-    
     def open_listen_popup(self):
         # This method is no longer used but kept for compatibility
         pass
@@ -548,8 +421,8 @@ class TFTPUDPApp:
     
     def start_sending(self):
         self.sending = True
-        self.abort_flag = False
         self.normal_send_btn.config(state='disabled')
+        self.fleet_send_btn.config(state='disabled')
         self.swap_send_btn.config(state='disabled')
         self.fail_outoforder_btn.config(state='disabled')
         self.fail_duplicate_btn.config(state='disabled')
@@ -569,6 +442,7 @@ class TFTPUDPApp:
         self.tftp_msg_queue.put("Cleaning up send UI...\n")
         self.sending = False
         self.normal_send_btn.config(state='normal')
+        self.fleet_send_btn.config(state='normal')
         self.swap_send_btn.config(state='normal')
         self.fail_outoforder_btn.config(state='normal')
         self.fail_duplicate_btn.config(state='normal')
@@ -584,280 +458,152 @@ class TFTPUDPApp:
         self.listen_radio.config(state='normal')
     
     def abort_send(self):
-        self.abort_flag = True
         self.tftp_msg_queue.put("Aborting send...\n")
-        if self.tftp_sock:
-            self.tftp_sock.close()
-            self.tftp_sock = None
+        if self.tftp_task:
+            self.tftp_task.cancel()
     
-    def _send_tftp_worker(self, ip, filename_req, file_data, total_bytes):
-        sock = None
+    async def _send_tftp_worker(self, ip, filename_req, file_data, total_bytes):
+        """Upload through the shared engine: RFC 2348 blksize, RFC 7440 windowsize, go back to the last ACK on loss"""
+        upload = Upload(ip, filename_req, file_data, log=self.tftp_msg_queue.put)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setblocking(False)
-            self.tftp_sock = sock
-            
-            # WRQ packet with options
-            opcode = 2
-            mode = b'octet'
-            wrq = struct.pack('!H', opcode) + filename_req.encode() + b'\0' + mode + b'\0size\0' + str(total_bytes).encode() + b'\0'
-            sock.sendto(wrq, (ip, 69))
-            self.tftp_msg_queue.put(f"Sent WRQ with size {total_bytes}\n")
-            
-            # Receive OACK or ACK 0
-            received_resp = False
-            while not self.abort_flag and not received_resp:
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    received_resp = True
-                except BlockingIOError:
-                    time.sleep(0.01)
-                    continue
-                except OSError:
-                    if self.abort_flag:
-                        raise Exception("Aborted during WRQ response")
-                    raise
-            if not received_resp:
-                raise Exception("Aborted during WRQ response")
-            
-            resp_opcode = struct.unpack('!H', data[:2])[0]
-            if resp_opcode not in (4, 6):
-                raise Exception("Unexpected response to WRQ")
-            if resp_opcode == 6:
-                # Parse OACK options (optional, for confirmation)
-                opt_data = data[2:]
-                confirmed_size = None
-                while len(opt_data) > 0:
-                    key_end = opt_data.find(b'\0')
-                    if key_end == -1:
-                        break
-                    key = opt_data[:key_end].decode()
-                    opt_data = opt_data[key_end + 1:]
-                    val_end = opt_data.find(b'\0')
-                    if val_end == -1:
-                        break
-                    val = opt_data[:val_end].decode()
-                    opt_data = opt_data[val_end + 1:]
-                    if key == 'size':
-                        confirmed_size = int(val)
-                self.tftp_msg_queue.put(f"Received OACK with confirmed size {confirmed_size}\n")
-            
-            # Send file in blocks
-            pos = 0
-            block_num = 1
-            while pos < len(file_data) and not self.abort_flag:
-                block_end = min(pos + 512, len(file_data))
-                block = file_data[pos:block_end]
-                data_pkt = struct.pack('!HH', 3, block_num) + block
-                sock.sendto(data_pkt, addr)
-                
-                hex_data = binascii.hexlify(block).decode()
-                if len(hex_data) > 200:
-                    hex_data = hex_data[:200] + '...'
-                self.tftp_msg_queue.put(f"Sent block {block_num} ({len(block)} bytes): {hex_data}\n")
-                
-                # Wait for ACK
-                received_ack = False
-                ack = None
-                while not self.abort_flag and not received_ack:
-                    try:
-                        ack, _ = sock.recvfrom(1024)
-                        received_ack = True
-                    except BlockingIOError:
-                        time.sleep(0.01)
-                        continue
-                    except OSError:
-                        if self.abort_flag:
-                            break
-                        raise
-                
-                if not received_ack:
-                    break
-                
-                if struct.unpack('!HH', ack[:4])[0] != 4 or struct.unpack('!H', ack[2:4])[0] != block_num:
-                    raise Exception("ACK mismatch")
-                
-                pos += 512
-                block_num += 1
-            
-            if self.abort_flag:
-                self.tftp_msg_queue.put(f"Upload aborted: {pos} bytes sent\n")
-            else:
-                self.tftp_msg_queue.put(f"Upload complete: {total_bytes} bytes\n")
+            await upload.run()
+            self.tftp_msg_queue.put(f"Upload complete: {total_bytes} bytes\n")
+        except asyncio.CancelledError:
+            self.tftp_msg_queue.put(f"Upload aborted: {upload.acked_bytes} bytes sent\n")
+            raise
         except Exception as e:
-            if self.abort_flag:
-                self.tftp_msg_queue.put(f"Upload aborted\n")
-            else:
-                self.tftp_msg_queue.put(f"Error: {str(e)}\n")
+            self.tftp_msg_queue.put(f"Error: {str(e)}\n")
         finally:
-            if sock:
-                sock.close()
-            self.tftp_sock = None
             # Signal the main thread to stop sending UI
             self._stop_sending_flag = True
     
-    def _send_tftp_worker_out_of_order(self, ip, filename_req, file_data, total_bytes):
+    async def _send_fleet_worker(self, targets, filename_req, file_data, concurrency):
+        """Upload one image to many controllers at once and finish with a summary table"""
+        start = time.monotonic()
+        try:
+            results = await upload_fleet(targets, filename_req, file_data, concurrency=concurrency, log=self.tftp_msg_queue.put)
+            self.tftp_msg_queue.put(f"Fleet upload finished in {time.monotonic() - start:.1f}s\n" + fleet_summary(results))
+        except asyncio.CancelledError:
+            self.tftp_msg_queue.put("Fleet upload aborted\n")
+            raise
+        except Exception as e:
+            self.tftp_msg_queue.put(f"Error: {str(e)}\n")
+        finally:
+            self._stop_sending_flag = True
+    
+    async def _open_upload(self, ip, filename_req, total_bytes):
+        """Send a WRQ with only the size option and return the session once the server answers
+        
+        The failure simulations drive the data phase themselves, one 512-byte block at a time.
+        """
+        session = await Session.open()
+        try:
+            wrq = request_packet(OP_WRQ, filename_req, {'size': total_bytes})
+            _, addr = await session.exchange(lambda: session.send(wrq, (ip, TFTP_PORT)), "WRQ response")
+        except BaseException:
+            session.close()
+            raise
+        session.peer = addr
+        return session
+    
+    async def _wait_for_ack(self, session, block_num):
+        """Wait for the ACK of one block; the failure simulations carry on without it"""
+        if await session.recv(TFTP_TIMEOUT) is None:
+            self.tftp_msg_queue.put(f"No ACK received for block {block_num}\n")
+    
+    async def _send_tftp_worker_out_of_order(self, ip, filename_req, file_data, total_bytes):
         """Send blocks out of order (every 4th and 5th block swapped)"""
-        sock = None
+        session = None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setblocking(False)
-            self.tftp_sock = sock
-            
-            wrq = struct.pack('!H', 2) + filename_req.encode() + b'\0' + b'octet' + b'\0size\0' + str(total_bytes).encode() + b'\0'
-            sock.sendto(wrq, (ip, 69))
             self.tftp_msg_queue.put(f"Sent WRQ with size {total_bytes}\n")
-            
-            # Wait for OACK/ACK
-            received_resp = False
-            while not self.abort_flag and not received_resp:
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    received_resp = True
-                except BlockingIOError:
-                    time.sleep(0.01)
-                    continue
+            session = await self._open_upload(ip, filename_req, total_bytes)
             
             # Prepare all blocks
             blocks = []
             pos = 0
             block_num = 1
             while pos < len(file_data):
-                block_end = min(pos + 512, len(file_data))
+                block_end = min(pos + BLOCK_SIZE, len(file_data))
                 blocks.append((block_num, file_data[pos:block_end]))
-                pos += 512
+                pos += BLOCK_SIZE
                 block_num += 1
             
             # Send blocks with some out of order
             idx = 0
-            while idx < len(blocks) and not self.abort_flag:
+            while idx < len(blocks):
                 # Every 3rd and 4th block swap order
                 if idx < len(blocks) - 1 and (idx + 1) % 4 == 3:
                     # Send block idx+1 first, then idx
                     for b_idx in [idx + 1, idx]:
                         block_num, block = blocks[b_idx]
-                        data_pkt = struct.pack('!HH', 3, block_num) + block
-                        sock.sendto(data_pkt, addr)
+                        session.send(data_packet(block_num, block))
                         self.tftp_msg_queue.put(f"Sent block {block_num} OUT OF ORDER ({len(block)} bytes)\n")
-                        # Wait for ACK
-                        ack = None
-                        while not self.abort_flag:
-                            try:
-                                ack, _ = sock.recvfrom(1024)
-                                break
-                            except BlockingIOError:
-                                time.sleep(0.01)
+                        await self._wait_for_ack(session, block_num)
                     idx += 2
                 else:
                     block_num, block = blocks[idx]
-                    data_pkt = struct.pack('!HH', 3, block_num) + block
-                    sock.sendto(data_pkt, addr)
+                    session.send(data_packet(block_num, block))
                     self.tftp_msg_queue.put(f"Sent block {block_num} ({len(block)} bytes)\n")
-                    # Wait for ACK
-                    while not self.abort_flag:
-                        try:
-                            ack, _ = sock.recvfrom(1024)
-                            break
-                        except BlockingIOError:
-                            time.sleep(0.01)
+                    await self._wait_for_ack(session, block_num)
                     idx += 1
             
             self.tftp_msg_queue.put(f"Out-of-order upload complete\n")
         except Exception as e:
             self.tftp_msg_queue.put(f"Error: {str(e)}\n")
         finally:
-            if sock:
-                sock.close()
-            self.tftp_sock = None
+            if session:
+                session.close()
             self._stop_sending_flag = True
     
-    def _send_tftp_worker_duplicate(self, ip, filename_req, file_data, total_bytes):
+    async def _send_tftp_worker_duplicate(self, ip, filename_req, file_data, total_bytes):
         """Send some blocks twice"""
-        sock = None
+        session = None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setblocking(False)
-            self.tftp_sock = sock
-            
-            wrq = struct.pack('!H', 2) + filename_req.encode() + b'\0' + b'octet' + b'\0size\0' + str(total_bytes).encode() + b'\0'
-            sock.sendto(wrq, (ip, 69))
-            
-            # Wait for OACK/ACK
-            received_resp = False
-            while not self.abort_flag and not received_resp:
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    received_resp = True
-                except BlockingIOError:
-                    time.sleep(0.01)
-                    continue
+            session = await self._open_upload(ip, filename_req, total_bytes)
             
             pos = 0
             block_num = 1
-            while pos < len(file_data) and not self.abort_flag:
-                block_end = min(pos + 512, len(file_data))
+            while pos < len(file_data):
+                block_end = min(pos + BLOCK_SIZE, len(file_data))
                 block = file_data[pos:block_end]
-                data_pkt = struct.pack('!HH', 3, block_num) + block
-                sock.sendto(data_pkt, addr)
+                data_pkt = data_packet(block_num, block)
+                session.send(data_pkt)
                 self.tftp_msg_queue.put(f"Sent block {block_num} ({len(block)} bytes)\n")
                 
                 # Send duplicate for every 5th block
                 if block_num % 5 == 0:
-                    time.sleep(0.05)
-                    sock.sendto(data_pkt, addr)
+                    await asyncio.sleep(0.05)
+                    session.send(data_pkt)
                     self.tftp_msg_queue.put(f"Sent DUPLICATE block {block_num}\n")
                 
-                # Wait for ACK
-                while not self.abort_flag:
-                    try:
-                        ack, _ = sock.recvfrom(1024)
-                        break
-                    except BlockingIOError:
-                        time.sleep(0.01)
+                await self._wait_for_ack(session, block_num)
                 
-                pos += 512
+                pos += BLOCK_SIZE
                 block_num += 1
             
             self.tftp_msg_queue.put(f"Duplicate blocks upload complete\n")
         except Exception as e:
             self.tftp_msg_queue.put(f"Error: {str(e)}\n")
         finally:
-            if sock:
-                sock.close()
-            self.tftp_sock = None
+            if session:
+                session.close()
             self._stop_sending_flag = True
     
-    def _send_tftp_worker_wrong_numbers(self, ip, filename_req, file_data, total_bytes):
+    async def _send_tftp_worker_wrong_numbers(self, ip, filename_req, file_data, total_bytes):
         """Send blocks with wrong block numbers"""
-        sock = None
+        session = None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setblocking(False)
-            self.tftp_sock = sock
-            
-            wrq = struct.pack('!H', 2) + filename_req.encode() + b'\0' + b'octet' + b'\0size\0' + str(total_bytes).encode() + b'\0'
-            sock.sendto(wrq, (ip, 69))
-            
-            # Wait for OACK/ACK
-            received_resp = False
-            while not self.abort_flag and not received_resp:
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    received_resp = True
-                except BlockingIOError:
-                    time.sleep(0.01)
-                    continue
+            session = await self._open_upload(ip, filename_req, total_bytes)
             
             pos = 0
             block_num = 1
-            while pos < len(file_data) and not self.abort_flag:
-                block_end = min(pos + 512, len(file_data))
+            while pos < len(file_data):
+                block_end = min(pos + BLOCK_SIZE, len(file_data))
                 block = file_data[pos:block_end]
                 
                 # Use wrong block number for every 7th block
                 wrong_num = block_num + 10 if block_num % 7 == 0 else block_num
-                data_pkt = struct.pack('!HH', 3, wrong_num) + block
-                sock.sendto(data_pkt, addr)
+                session.send(data_packet(wrong_num, block))
                 
                 if wrong_num != block_num:
                     self.tftp_msg_queue.put(f"Sent block with WRONG NUMBER {wrong_num} (should be {block_num})\n")
@@ -865,162 +611,94 @@ class TFTPUDPApp:
                     self.tftp_msg_queue.put(f"Sent block {block_num} ({len(block)} bytes)\n")
                 
                 # Wait for ACK (may fail due to wrong block number)
-                try:
-                    sock.settimeout(1.0)
-                    ack, _ = sock.recvfrom(1024)
-                    sock.settimeout(None)
-                except:
-                    sock.settimeout(None)
-                    self.tftp_msg_queue.put(f"No ACK received for block {block_num}\n")
+                await self._wait_for_ack(session, block_num)
                 
-                pos += 512
+                pos += BLOCK_SIZE
                 block_num += 1
             
             self.tftp_msg_queue.put(f"Wrong block numbers upload complete\n")
         except Exception as e:
             self.tftp_msg_queue.put(f"Error: {str(e)}\n")
         finally:
-            if sock:
-                sock.close()
-            self.tftp_sock = None
+            if session:
+                session.close()
             self._stop_sending_flag = True
     
-    def _send_tftp_worker_truncated(self, ip, filename_req, file_data, total_bytes):
+    async def _send_tftp_worker_truncated(self, ip, filename_req, file_data, total_bytes):
         """Stop transfer after 60% of file"""
-        sock = None
+        session = None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setblocking(False)
-            self.tftp_sock = sock
-            
-            wrq = struct.pack('!H', 2) + filename_req.encode() + b'\0' + b'octet' + b'\0size\0' + str(total_bytes).encode() + b'\0'
-            sock.sendto(wrq, (ip, 69))
             self.tftp_msg_queue.put(f"Sent WRQ with size {total_bytes} (will truncate at 60%)\n")
-            
-            # Wait for OACK/ACK
-            received_resp = False
-            while not self.abort_flag and not received_resp:
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    received_resp = True
-                except BlockingIOError:
-                    time.sleep(0.01)
-                    continue
+            session = await self._open_upload(ip, filename_req, total_bytes)
             
             truncate_at = int(len(file_data) * 0.6)
             pos = 0
             block_num = 1
-            while pos < truncate_at and not self.abort_flag:
-                block_end = min(pos + 512, len(file_data))
+            while pos < truncate_at:
+                block_end = min(pos + BLOCK_SIZE, len(file_data))
                 block = file_data[pos:block_end]
-                data_pkt = struct.pack('!HH', 3, block_num) + block
-                sock.sendto(data_pkt, addr)
+                session.send(data_packet(block_num, block))
                 self.tftp_msg_queue.put(f"Sent block {block_num} ({len(block)} bytes)\n")
                 
-                # Wait for ACK
-                while not self.abort_flag:
-                    try:
-                        ack, _ = sock.recvfrom(1024)
-                        break
-                    except BlockingIOError:
-                        time.sleep(0.01)
+                await self._wait_for_ack(session, block_num)
                 
-                pos += 512
+                pos += BLOCK_SIZE
                 block_num += 1
             
             self.tftp_msg_queue.put(f"Transfer TRUNCATED at {pos} bytes (60% of {total_bytes})\n")
         except Exception as e:
             self.tftp_msg_queue.put(f"Error: {str(e)}\n")
         finally:
-            if sock:
-                sock.close()
-            self.tftp_sock = None
+            if session:
+                session.close()
             self._stop_sending_flag = True
     
-    def _send_tftp_worker_timeout(self, ip, filename_req, file_data, total_bytes):
+    async def _send_tftp_worker_timeout(self, ip, filename_req, file_data, total_bytes):
         """Pause for 10 seconds mid-transfer"""
-        sock = None
+        session = None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setblocking(False)
-            self.tftp_sock = sock
-            
-            wrq = struct.pack('!H', 2) + filename_req.encode() + b'\0' + b'octet' + b'\0size\0' + str(total_bytes).encode() + b'\0'
-            sock.sendto(wrq, (ip, 69))
-            
-            # Wait for OACK/ACK
-            received_resp = False
-            while not self.abort_flag and not received_resp:
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    received_resp = True
-                except BlockingIOError:
-                    time.sleep(0.01)
-                    continue
+            session = await self._open_upload(ip, filename_req, total_bytes)
             
             pause_at_block = 5
             pos = 0
             block_num = 1
-            while pos < len(file_data) and not self.abort_flag:
+            while pos < len(file_data):
                 # Pause at block 5
                 if block_num == pause_at_block:
                     self.tftp_msg_queue.put(f"⏸️ PAUSING for 10 seconds to simulate timeout...\n")
-                    time.sleep(10)
+                    await asyncio.sleep(10)
                     self.tftp_msg_queue.put(f"▶️ Resuming transfer...\n")
                 
-                block_end = min(pos + 512, len(file_data))
+                block_end = min(pos + BLOCK_SIZE, len(file_data))
                 block = file_data[pos:block_end]
-                data_pkt = struct.pack('!HH', 3, block_num) + block
-                sock.sendto(data_pkt, addr)
+                session.send(data_packet(block_num, block))
                 self.tftp_msg_queue.put(f"Sent block {block_num} ({len(block)} bytes)\n")
                 
-                # Wait for ACK
-                while not self.abort_flag:
-                    try:
-                        ack, _ = sock.recvfrom(1024)
-                        break
-                    except BlockingIOError:
-                        time.sleep(0.01)
+                await self._wait_for_ack(session, block_num)
                 
-                pos += 512
+                pos += BLOCK_SIZE
                 block_num += 1
             
             self.tftp_msg_queue.put(f"Timeout simulation upload complete\n")
         except Exception as e:
             self.tftp_msg_queue.put(f"Error: {str(e)}\n")
         finally:
-            if sock:
-                sock.close()
-            self.tftp_sock = None
+            if session:
+                session.close()
             self._stop_sending_flag = True
     
-    def _send_tftp_worker_packet_loss(self, ip, filename_req, file_data, total_bytes):
+    async def _send_tftp_worker_packet_loss(self, ip, filename_req, file_data, total_bytes):
         """Randomly drop 30% of packets"""
-        sock = None
+        session = None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setblocking(False)
-            self.tftp_sock = sock
-            
-            wrq = struct.pack('!H', 2) + filename_req.encode() + b'\0' + b'octet' + b'\0size\0' + str(total_bytes).encode() + b'\0'
-            sock.sendto(wrq, (ip, 69))
             self.tftp_msg_queue.put(f"Sent WRQ - will drop ~30% of packets randomly\n")
-            
-            # Wait for OACK/ACK
-            received_resp = False
-            while not self.abort_flag and not received_resp:
-                try:
-                    data, addr = sock.recvfrom(1024)
-                    received_resp = True
-                except BlockingIOError:
-                    time.sleep(0.01)
-                    continue
+            session = await self._open_upload(ip, filename_req, total_bytes)
             
             pos = 0
             block_num = 1
             dropped_count = 0
-            while pos < len(file_data) and not self.abort_flag:
-                block_end = min(pos + 512, len(file_data))
+            while pos < len(file_data):
+                block_end = min(pos + BLOCK_SIZE, len(file_data))
                 block = file_data[pos:block_end]
                 
                 # 30% chance to drop packet
@@ -1028,28 +706,19 @@ class TFTPUDPApp:
                     self.tftp_msg_queue.put(f"🔴 DROPPED packet for block {block_num}\n")
                     dropped_count += 1
                 else:
-                    data_pkt = struct.pack('!HH', 3, block_num) + block
-                    sock.sendto(data_pkt, addr)
+                    session.send(data_packet(block_num, block))
                     self.tftp_msg_queue.put(f"Sent block {block_num} ({len(block)} bytes)\n")
-                    
-                    # Wait for ACK
-                    while not self.abort_flag:
-                        try:
-                            ack, _ = sock.recvfrom(1024)
-                            break
-                        except BlockingIOError:
-                            time.sleep(0.01)
+                    await self._wait_for_ack(session, block_num)
                 
-                pos += 512
+                pos += BLOCK_SIZE
                 block_num += 1
             
             self.tftp_msg_queue.put(f"Packet loss simulation complete - dropped {dropped_count} packets\n")
         except Exception as e:
             self.tftp_msg_queue.put(f"Error: {str(e)}\n")
         finally:
-            if sock:
-                sock.close()
-            self.tftp_sock = None
+            if session:
+                session.close()
             self._stop_sending_flag = True
     
     def normal_send_tftp(self):
@@ -1066,8 +735,27 @@ class TFTPUDPApp:
             file_data = bytearray(f.read())
         total_bytes = len(file_data)
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker(ip, filename_req, file_data, total_bytes))
+    
+    def fleet_send_tftp(self):
+        if self.sending:
+            return
+        filename = self.file_entry.get()
+        try:
+            targets = parse_targets(self.ip_entry.get())
+            concurrency = int(self.fleet_parallel.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid target list or parallel count: {e}")
+            return
+        if not targets or concurrency < 1 or not filename or not os.path.exists(filename):
+            messagebox.showerror("Error", "Invalid IP or file")
+            return
+        self.start_sending()
+        self.tftp_msg_queue.put(f"Starting fleet TFTP upload to {len(targets)} targets, {concurrency} at a time: {filename}\n")
+        with open(filename, 'rb') as f:
+            file_data = bytearray(f.read())
+        filename_req = os.path.basename(filename)
+        self.tftp_task = self.tftp_engine.submit(self._send_fleet_worker(targets, filename_req, file_data, concurrency))
     
     def swap_send_tftp(self):
         if self.sending:
@@ -1090,8 +778,7 @@ class TFTPUDPApp:
             file_data[pos1], file_data[pos2] = file_data[pos2], file_data[pos1]
             self.tftp_msg_queue.put(f"Swapped bytes at positions {pos1} and {pos2}\n")
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker(ip, filename_req, file_data, total_bytes))
     
     def failure_out_of_order(self):
         """Send blocks out of order"""
@@ -1108,8 +795,7 @@ class TFTPUDPApp:
             file_data = bytearray(f.read())
         total_bytes = len(file_data)
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker_out_of_order, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker_out_of_order(ip, filename_req, file_data, total_bytes))
     
     def failure_duplicate(self):
         """Send some blocks twice"""
@@ -1126,8 +812,7 @@ class TFTPUDPApp:
             file_data = bytearray(f.read())
         total_bytes = len(file_data)
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker_duplicate, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker_duplicate(ip, filename_req, file_data, total_bytes))
     
     def failure_wrong_numbers(self):
         """Send blocks with wrong block numbers"""
@@ -1144,8 +829,7 @@ class TFTPUDPApp:
             file_data = bytearray(f.read())
         total_bytes = len(file_data)
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker_wrong_numbers, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker_wrong_numbers(ip, filename_req, file_data, total_bytes))
     
     def failure_truncated(self):
         """Stop transfer early (truncated)"""
@@ -1162,8 +846,7 @@ class TFTPUDPApp:
             file_data = bytearray(f.read())
         total_bytes = len(file_data)
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker_truncated, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker_truncated(ip, filename_req, file_data, total_bytes))
     
     def failure_timeout(self):
         """Pause mid-transfer to simulate timeout"""
@@ -1180,8 +863,7 @@ class TFTPUDPApp:
             file_data = bytearray(f.read())
         total_bytes = len(file_data)
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker_timeout, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker_timeout(ip, filename_req, file_data, total_bytes))
     
     def failure_packet_loss(self):
         """Randomly drop packets"""
@@ -1198,8 +880,7 @@ class TFTPUDPApp:
             file_data = bytearray(f.read())
         total_bytes = len(file_data)
         filename_req = os.path.basename(filename)
-        self.tftp_thread = threading.Thread(target=self._send_tftp_worker_packet_loss, args=(ip, filename_req, file_data, total_bytes), daemon=True)
-        self.tftp_thread.start()
+        self.tftp_task = self.tftp_engine.submit(self._send_tftp_worker_packet_loss(ip, filename_req, file_data, total_bytes))
     
     def toggle_udp(self):
         if not self.udp_running:
@@ -1239,13 +920,11 @@ class TFTPUDPApp:
                 self.udp_sock.close()
         if self.tftp_listening:
             self.tftp_listening = False
-            if self.tftp_sock:
-                self.tftp_sock.close()
-        if self.sending:
-            self.abort_flag = True
-            if self.tftp_sock:
-                self.tftp_sock.close()
-                self.tftp_sock = None
+            if self.tftp_listener:
+                self.tftp_engine.submit(self.tftp_listener.stop())
+        if self.sending and self.tftp_task:
+            self.tftp_task.cancel()
+        self.tftp_engine.stop()
         self.root.destroy()
 
 if __name__ == "__main__":
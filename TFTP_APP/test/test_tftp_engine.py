@@ -0,0 +1,41 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tftp_engine import TFTPServer, Upload
+
+
+class TFTPServerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out_path = os.path.join(self.tmp.name, "received.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_consecutive_uploads_write_output_path(self):
+        async def scenario():
+            server = TFTPServer(self.out_path)
+            await server.start('127.0.0.1', 0)
+            port = server.transport.get_extra_info('sockname')[1]
+            try:
+                # The second WRQ arrives while the first session is still dallying
+                await Upload('127.0.0.1', "first.bin", b"first upload", port=port, log_blocks=False).run()
+                with open(self.out_path, 'rb') as f:
+                    self.assertEqual(f.read(), b"first upload")
+                await Upload('127.0.0.1', "second.bin", b"second upload", port=port, log_blocks=False).run()
+                with open(self.out_path, 'rb') as f:
+                    self.assertEqual(f.read(), b"second upload")
+            finally:
+                await server.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(os.listdir(self.tmp.name), ["received.bin"])
+
+
+if __name__ == "__main__":
+    unittest.main()
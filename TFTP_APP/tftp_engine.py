@@ -0,0 +1,651 @@
+import asyncio
+import binascii
+import ipaddress
+import os
+import socket
+import struct
+import sys
+import threading
+
+TFTP_PORT = 69
+BLOCK_SIZE = 512           # RFC 1350 block size, used when blksize isn't negotiated
+MAX_BLOCK_SIZE = 65464     # RFC 2348 upper limit for blksize
+DEFAULT_MTU = 1500         # Ethernet, assumed when the route MTU can't be read
+TFTP_OVERHEAD = 32         # IPv4 20 + UDP 8 + TFTP DATA header 4
+IP_MTU = 14                # Linux getsockopt option for the route MTU (not exported by the socket module)
+DEFAULT_WINDOW_SIZE = 16   # RFC 7440: blocks sent before waiting for an ACK
+TFTP_TIMEOUT = 1.0         # Seconds before the first retransmission
+MAX_TIMEOUT = 8.0          # Exponential backoff stops doubling here
+TFTP_MAX_RETRIES = 5
+RECEIVE_TIMEOUT = 5.0      # Seconds of silence after which a receiver gives up on the sender
+FLEET_CONCURRENCY = 64     # Uploads a fleet runs at once; controllers are slow to write, so more in parallel is cheap
+FLEET_ATTEMPTS = 3         # Whole-transfer attempts per fleet target
+MAX_FLEET_TARGETS = 1024
+
+OP_RRQ, OP_WRQ, OP_DATA, OP_ACK, OP_ERROR, OP_OACK = 1, 2, 3, 4, 5, 6
+
+
+class TFTPError(Exception):
+    """The peer sent an ERROR packet, stopped answering or broke the protocol"""
+
+
+def parse_tftp_options(opt_data):
+    """Parse the NUL-separated key/value pairs of a request or OACK into a dict (keys lowercased)"""
+    options = {}
+    parts = opt_data.split(b'\0')
+    for i in range(0, len(parts) - 1, 2):
+        if not parts[i]:
+            break
+        options[parts[i].decode(errors='replace').lower()] = parts[i + 1].decode(errors='replace')
+    return options
+
+
+def path_block_size(ip):
+    """Largest blksize whose DATA packets reach ip without IP fragmentation"""
+    mtu = DEFAULT_MTU
+    if sys.platform.startswith('linux'):
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+                probe.connect((ip, TFTP_PORT))  # Picks the route, nothing is sent
+                mtu = probe.getsockopt(socket.IPPROTO_IP, IP_MTU)
+        except OSError:
+            pass
+    return max(BLOCK_SIZE, min(MAX_BLOCK_SIZE, mtu - TFTP_OVERHEAD))
+
+
+def negotiated_block_size(options, requested):
+    """blksize from an OACK, or BLOCK_SIZE if it is missing or not a value we offered"""
+    try:
+        block_size = int(options.get('blksize', BLOCK_SIZE))
+    except ValueError:
+        return BLOCK_SIZE
+    return block_size if 8 <= block_size <= requested else BLOCK_SIZE
+
+
+def parse_targets(text):
+    """IPv4 addresses from a comma or space separated list of addresses and CIDR blocks
+
+    Order is kept and duplicates dropped. A CIDR block expands to its usable
+    hosts. Raises ValueError for anything that isn't an address or network.
+    """
+    targets = []
+    seen = set()
+    for item in text.replace(',', ' ').split():
+        network = ipaddress.IPv4Network(item, strict=False)
+        hosts = [network.network_address] if network.num_addresses == 1 else network.hosts()
+        for host in hosts:
+            ip = str(host)
+            if ip not in seen:
+                if len(targets) == MAX_FLEET_TARGETS:
+                    raise ValueError(f"More than {MAX_FLEET_TARGETS} targets")
+                seen.add(ip)
+                targets.append(ip)
+    return targets
+
+
+def request_packet(opcode, filename, options=None, mode='octet'):
+    """RRQ/WRQ packet, with RFC 2347 options appended in order"""
+    packet = struct.pack('!H', opcode) + filename.encode() + b'\0' + mode.encode() + b'\0'
+    for key, value in (options or {}).items():
+        packet += key.encode() + b'\0' + str(value).encode() + b'\0'
+    return packet
+
+
+def data_packet(block_num, block):
+    return struct.pack('!HH', OP_DATA, block_num & 0xFFFF) + block  # Block numbers roll over after 65535
+
+
+def ack_packet(block_num):
+    return struct.pack('!HH', OP_ACK, block_num & 0xFFFF)
+
+
+def error_packet(code, message):
+    return struct.pack('!HH', OP_ERROR, code) + message.encode() + b'\0'
+
+
+def hex_preview(block, limit=200):
+    hex_data = binascii.hexlify(block).decode()
+    return hex_data[:limit] + '...' if len(hex_data) > limit else hex_data
+
+
+class _Endpoint(asyncio.DatagramProtocol):
+    """Hands received datagrams to whoever is awaiting Session.recv()"""
+
+    def __init__(self):
+        self.packets = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.packets.put_nowait((data, addr))
+
+    def error_received(self, exc):
+        # ICMP errors (port unreachable and the like) are treated as silence; the retry timer deals with them
+        pass
+
+
+class Session:
+    """One side of a TFTP transfer: a UDP socket on its own ephemeral port (its transfer ID)
+
+    recv() sleeps in the event loop until a datagram arrives or its timer
+    expires, so waiting costs no CPU and an ACK is handled as soon as it lands.
+    Until peer is set any sender is accepted; after that, packets from other
+    addresses get ERROR 5 (unknown transfer ID) as RFC 1350 asks.
+    """
+
+    def __init__(self, transport, endpoint, peer=None):
+        self.transport = transport
+        self.endpoint = endpoint
+        self.peer = peer
+
+    @classmethod
+    async def open(cls, peer=None, local_addr=('0.0.0.0', 0)):
+        loop = asyncio.get_running_loop()
+        transport, endpoint = await loop.create_datagram_endpoint(_Endpoint, local_addr=local_addr)
+        return cls(transport, endpoint, peer)
+
+    def send(self, packet, addr=None):
+        self.transport.sendto(packet, addr or self.peer)
+
+    async def recv(self, timeout):
+        """Next packet from the peer as (data, addr), or None once timeout seconds have passed
+
+        ERROR packets from the peer are raised as TFTPError.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                data, addr = await asyncio.wait_for(self.endpoint.packets.get(), remaining)
+            except asyncio.TimeoutError:
+                return None
+            if self.peer is not None and addr != self.peer:
+                self.transport.sendto(error_packet(5, "Unknown transfer ID"), addr)
+                continue
+            if len(data) < 4:
+                continue
+            if struct.unpack('!H', data[:2])[0] == OP_ERROR:
+                message = data[4:].split(b'\0')[0].decode(errors='replace')
+                raise TFTPError(f"TFTP error {struct.unpack('!H', data[2:4])[0]}: {message}")
+            return data, addr
+
+    async def exchange(self, send, what, timeout=TFTP_TIMEOUT, max_retries=TFTP_MAX_RETRIES):
+        """Call send() until a reply arrives, doubling the wait after every silent attempt"""
+        for _ in range(max_retries + 1):
+            send()
+            reply = await self.recv(timeout)
+            if reply is not None:
+                return reply
+            timeout = min(timeout * 2, MAX_TIMEOUT)
+        raise TFTPError(f"No {what} after {max_retries} retries")
+
+    def close(self):
+        self.transport.close()
+
+
+class Upload:
+    """Push one file to a TFTP server (WRQ with size, blksize and windowsize options)
+
+    Data goes out go-back-N: up to window blocks are in flight, and a gap ACK
+    or the timer of the oldest unacknowledged block sends everything again from
+    there. That timer starts when the block is sent and doubles, up to
+    MAX_TIMEOUT, each time the same block times out again. log(message) and
+    progress(acked_bytes, total_bytes) are called on the event loop thread;
+    acked_bytes is kept up to date so an aborted upload can say how far it got.
+    """
+
+    def __init__(self, ip, filename, data, port=TFTP_PORT, window_size=DEFAULT_WINDOW_SIZE, block_size=None,
+                 timeout=TFTP_TIMEOUT, max_retries=TFTP_MAX_RETRIES, log=None, progress=None, log_blocks=True):
+        self.ip = ip
+        self.filename = filename
+        self.data = data
+        self.port = port
+        self.window_size = window_size
+        self.block_size = block_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda acked_bytes, total_bytes: None)
+        self.log_blocks = log_blocks
+        self.answered = False  # Whether the server replied to the WRQ at all
+        self.acked_bytes = 0
+
+    async def run(self):
+        """Upload the file and return its size; raises TFTPError if the server gives up or stops answering"""
+        session = await Session.open()
+        try:
+            await self._transfer(session)
+        finally:
+            session.close()
+        return len(self.data)
+
+    async def _transfer(self, session):
+        total_bytes = len(self.data)
+        requested_block_size = self.block_size or path_block_size(self.ip)
+        wrq = request_packet(OP_WRQ, self.filename, {'size': total_bytes, 'blksize': requested_block_size,
+                                                     'windowsize': self.window_size})
+        self.log(f"Sent WRQ with size {total_bytes}, blksize {requested_block_size}, windowsize {self.window_size}\n")
+        data, addr = await session.exchange(lambda: session.send(wrq, (self.ip, self.port)), "WRQ response",
+                                            self.timeout, self.max_retries)
+        session.peer = addr  # The server answers from its transfer ID, not port 69
+        self.answered = True
+
+        resp_opcode = struct.unpack('!H', data[:2])[0]
+        if resp_opcode == OP_ACK and struct.unpack('!H', data[2:4])[0] == 0:
+            window = 1  # A plain ACK 0 means the server ignored our options
+            block_size = BLOCK_SIZE
+        elif resp_opcode == OP_OACK:
+            options = parse_tftp_options(data[2:])
+            window = max(1, min(self.window_size, int(options.get('windowsize', 1))))
+            block_size = negotiated_block_size(options, requested_block_size)
+            self.log(f"Received OACK with confirmed size {options.get('size')}, blksize {block_size}, windowsize {window}\n")
+        else:
+            raise TFTPError("Unexpected response to WRQ")
+        await self.send_data(session, block_size, window)
+
+    async def send_data(self, session, block_size, window):
+        """Send the DATA phase to session.peer once options are settled; also serves RRQs"""
+        loop = asyncio.get_running_loop()
+        total_bytes = len(self.data)
+        # The transfer always ends with a short block, an empty one if the size is a multiple of the block size
+        num_blocks = total_bytes // block_size + 1
+        acked = 0    # Blocks the server has acknowledged
+        sent = 0     # Blocks sent in the current window
+        highest_sent = 0
+        resent_from = None  # acked value we last went back to, so repeated ACKs don't trigger more resends
+        sent_at = {}  # Block index -> loop time it was last sent, for the retransmission timer
+        retries = 0
+        timeout = self.timeout
+        while acked < num_blocks:
+            # Fill the window
+            while sent < num_blocks and sent - acked < window:
+                block = self.data[sent * block_size:(sent + 1) * block_size]
+                session.send(data_packet(sent + 1, block))
+                sent += 1
+                sent_at[sent] = loop.time()
+                if self.log_blocks:
+                    resent = " RESENT" if sent <= highest_sent else ""
+                    self.log(f"Sent block {sent}{resent} ({len(block)} bytes): {hex_preview(block)}\n")
+                highest_sent = max(highest_sent, sent)
+
+            # Wait for an ACK, at most until the oldest unacknowledged block is due again
+            reply = await session.recv(sent_at[acked + 1] + timeout - loop.time())
+            if reply is None:
+                retries += 1
+                if retries > self.max_retries:
+                    raise TFTPError(f"No ACK after {self.max_retries} retries at block {acked + 1}")
+                timeout = min(timeout * 2, MAX_TIMEOUT)
+                self.log(f"Timeout waiting for ACK, resending from block {acked + 1} (next timeout {timeout:g} s)\n")
+                sent = acked
+                resent_from = acked
+                continue
+
+            ack_data, _ = reply
+            opcode = struct.unpack('!H', ack_data[:2])[0]
+            if opcode == OP_OACK:
+                continue  # Repeated OACK: the server is still waiting for our first block
+            if opcode != OP_ACK:
+                raise TFTPError("ACK mismatch")
+            # Map the 16-bit block number onto the blocks sent so far
+            delta = (struct.unpack('!H', ack_data[2:4])[0] - acked) & 0xFFFF
+            if delta > sent - acked:
+                continue  # Stale ACK from before the last go-back
+            if delta == 0:
+                # Duplicate ACK. With a window it means the server timed out or saw a gap right after
+                # the last acknowledged block; with stop-and-wait it is ignored (Sorcerer's Apprentice)
+                if window == 1 or resent_from == acked:
+                    continue
+            else:
+                for index in range(acked + 1, acked + delta + 1):
+                    sent_at.pop(index, None)
+                acked += delta
+                retries = 0
+                timeout = self.timeout
+                self.acked_bytes = min(acked * block_size, total_bytes)
+                self.progress(self.acked_bytes, total_bytes)
+                if acked == sent:
+                    resent_from = None
+                    continue
+            # Server acknowledged the last good block before a gap; go back to it
+            self.log(f"Server acknowledged block {acked} of {sent}, resending from block {acked + 1}\n")
+            sent = acked
+            resent_from = acked
+
+
+async def upload_fleet(targets, filename, data, concurrency=FLEET_CONCURRENCY, attempts=FLEET_ATTEMPTS,
+                       log=None, **upload_options):
+    """Upload the same file to every target, at most concurrency transfers at a time
+
+    Each target that answers gets up to attempts tries; one that never
+    replies to its WRQ is not tried again. Progress is logged per target in
+    25% steps. Returns one dict per target, in target order, with ip, ok,
+    attempts, seconds and error (the last failure, or None).
+    """
+    log = log or (lambda message: None)
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def upload_one(ip):
+        def target_log(message):
+            log(f"[{ip}] {message}")
+
+        def progress(acked_bytes, total_bytes):
+            quarter = 4 * acked_bytes // total_bytes if total_bytes else 4
+            if quarter > reported[0]:
+                reported[0] = quarter
+                target_log(f"{25 * quarter}% ({acked_bytes} of {total_bytes} bytes)\n")
+
+        async with limit:
+            start = loop.time()
+            error = None
+            for attempt in range(1, attempts + 1):
+                reported = [0]
+                upload = Upload(ip, filename, data, log=target_log, progress=progress, log_blocks=False, **upload_options)
+                try:
+                    await upload.run()
+                    return {'ip': ip, 'ok': True, 'attempts': attempt, 'seconds': loop.time() - start, 'error': None}
+                except Exception as e:
+                    error = str(e)
+                    target_log(f"Attempt {attempt} of {attempts} failed: {error}\n")
+                    if not upload.answered:
+                        break
+            return {'ip': ip, 'ok': False, 'attempts': attempt, 'seconds': loop.time() - start, 'error': error}
+
+    return await asyncio.gather(*(upload_one(ip) for ip in targets))
+
+
+def fleet_summary(results):
+    """Fixed-width table of upload_fleet results for the log"""
+    lines = [f"{'Target':<16} {'Result':<7} {'Tries':>5} {'Time':>8}  Error",
+             f"{'-' * 16} {'-' * 7} {'-' * 5} {'-' * 8}  {'-' * 5}"]
+    for result in results:
+        lines.append(f"{result['ip']:<16} {'OK' if result['ok'] else 'FAILED':<7} {result['attempts']:>5} "
+                     f"{result['seconds']:>7.1f}s  {result['error'] or ''}")
+    succeeded = sum(result['ok'] for result in results)
+    lines.append(f"{succeeded} of {len(results)} targets updated")
+    return "\n".join(lines) + "\n"
+
+
+class _Listener(asyncio.DatagramProtocol):
+    """The well-known port: only ever sees requests, which it hands to the server"""
+
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.request_received(data, addr)
+
+
+class TFTPServer:
+    """Listen for TFTP requests and run every one as its own concurrent session
+
+    Each RRQ/WRQ is answered from a new Session on an ephemeral port (its
+    transfer ID, RFC 1350), so any number of clients can push and pull at
+    the same time without touching the listening socket. Uploads are saved
+    to out_path; while another upload is still writing there, the next one
+    goes to the same name with the client's address appended. Downloads are
+    served from the directory holding out_path. Log lines are prefixed with
+    the client's address.
+    """
+
+    def __init__(self, out_path, log=None):
+        self.out_path = out_path
+        self.root = os.path.dirname(os.path.abspath(out_path))
+        self.log = log or (lambda message: None)
+        self.transport = None
+        self.host = '0.0.0.0'
+        self.sessions = {}     # Client address -> task, so a retransmitted request doesn't start a second session
+        self.writing = set()   # Output paths of uploads in progress
+
+    async def start(self, host, port=TFTP_PORT):
+        """Bind the listening socket; raises OSError if the port can't be opened"""
+        loop = asyncio.get_running_loop()
+        self.host = host
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: _Listener(self), local_addr=(host, port))
+
+    async def stop(self):
+        """Close the listening socket and cancel every session in progress"""
+        if self.transport:
+            self.transport.close()
+        sessions = list(self.sessions.values())
+        for task in sessions:
+            task.cancel()
+        await asyncio.gather(*sessions, return_exceptions=True)
+
+    def request_received(self, data, addr):
+        if addr in self.sessions or len(data) < 4:
+            return
+        task = asyncio.ensure_future(self._session(data, addr))
+        self.sessions[addr] = task
+        task.add_done_callback(lambda _: self.sessions.pop(addr, None))
+
+    async def _session(self, data, addr):
+        def log(message):
+            self.log(f"[{addr[0]}:{addr[1]}] {message}")
+
+        session = await Session.open(peer=addr, local_addr=(self.host, 0))
+        try:
+            opcode = struct.unpack('!H', data[:2])[0]
+            parts = data[2:].split(b'\0')
+            if opcode not in (OP_RRQ, OP_WRQ) or len(parts) < 3:
+                session.send(error_packet(4, "Illegal TFTP operation"))
+                return
+            filename_req = parts[0].decode(errors='replace')
+            mode = parts[1].decode(errors='replace')
+            options = parse_tftp_options(b'\0'.join(parts[2:]))
+            if opcode == OP_WRQ:
+                await self._receive(session, filename_req, mode, options, log)
+            else:
+                await self._serve(session, filename_req, mode, options, log)
+        except asyncio.CancelledError:
+            log("Transfer cancelled\n")
+            raise
+        except Exception as e:
+            log(f"Error: {str(e)}\n")
+        finally:
+            session.close()
+
+    def _negotiate(self, options, addr, transfer_size=None):
+        """Answer a request's options; returns (block_size, window, OACK packet or None)
+
+        blksize is capped to what fits the path back to the client and
+        windowsize to DEFAULT_WINDOW_SIZE. size/tsize is echoed, or filled in
+        with transfer_size for reads.
+        """
+        block_size, window = BLOCK_SIZE, 1
+        reply = {}
+        for key in ('size', 'tsize'):
+            if options.get(key, '').isdigit():
+                reply[key] = options[key] if transfer_size is None else transfer_size
+        if options.get('blksize', '').isdigit() and int(options['blksize']) >= 8:
+            block_size = min(int(options['blksize']), path_block_size(addr[0]))
+            reply['blksize'] = block_size
+        if options.get('windowsize', '').isdigit() and int(options['windowsize']) >= 1:
+            window = min(int(options['windowsize']), DEFAULT_WINDOW_SIZE)
+            reply['windowsize'] = window
+        if not reply:
+            return block_size, window, None
+        oack = struct.pack('!H', OP_OACK)
+        for key, value in reply.items():
+            oack += key.encode() + b'\0' + str(value).encode() + b'\0'
+        return block_size, window, oack
+
+    def _claim_output(self, addr):
+        path = self.out_path
+        if path in self.writing:
+            stem, ext = os.path.splitext(self.out_path)
+            path = f"{stem}_{addr[0]}_{addr[1]}{ext}"
+        self.writing.add(path)
+        return path
+
+    async def _serve(self, session, filename_req, mode, options, log):
+        """RRQ: send a file from the server directory"""
+        log(f"RRQ: {filename_req} ({mode})\n")
+        path = os.path.join(self.root, os.path.basename(filename_req))  # No paths outside the server directory
+        try:
+            with open(path, 'rb') as f:
+                file_data = f.read()
+        except OSError:
+            session.send(error_packet(1, "File not found"))
+            log(f"File not found: {path}\n")
+            return
+        block_size, window, oack = self._negotiate(options, session.peer, len(file_data))
+        if oack:
+            # The client confirms the OACK with ACK 0 before any data is sent (RFC 2347)
+            reply, _ = await session.exchange(lambda: session.send(oack), "ACK of OACK")
+            if struct.unpack('!HH', reply[:4]) != (OP_ACK, 0):
+                raise TFTPError("Expected ACK 0 after OACK")
+            log(f"Sent OACK with size {len(file_data)}, blksize {block_size}, windowsize {window}\n")
+        sender = Upload(session.peer[0], filename_req, file_data, log=log, log_blocks=False)
+        await sender.send_data(session, block_size, window)
+        log(f"Sent {path} ({len(file_data)} bytes)\n")
+
+    async def _receive(self, session, filename_req, mode, options, log):
+        """WRQ: receive into the output file, reporting missing, duplicate and out-of-order blocks"""
+        addr = session.peer
+        log(f"WRQ: {filename_req} ({mode})\n")
+        size_option = options.get('size', options.get('tsize', ''))
+        expected_size = int(size_option) if size_option.isdigit() else None
+        block_size, window, oack = self._negotiate(options, addr)
+        out_filename = self._claim_output(addr)
+        try:
+            # Send OACK or ACK 0; either is resent if the first DATA doesn't arrive
+            last_ack = oack or ack_packet(0)
+            session.send(last_ack)
+            if oack:
+                log(f"Sent OACK with expected size {expected_size}, blksize {block_size}, windowsize {window}\n")
+
+            total_received = 0
+            missing_blocks = []
+            completed = False
+            with open(out_filename, 'wb') as f:
+                block_num = 1   # Next block expected, counting past 65535
+                in_window = 0
+                gap_at = None   # block_num we last asked to be resent from, so a gap is reported once
+                silent = 0.0
+                while True:
+                    reply = await session.recv(TFTP_TIMEOUT)
+                    if reply is None:
+                        silent += TFTP_TIMEOUT
+                        if silent >= RECEIVE_TIMEOUT:
+                            # Timeout waiting for packet - might be missing blocks
+                            if expected_size is not None and total_received < expected_size:
+                                missing_bytes = expected_size - total_received
+                                log(f"⚠️ TIMEOUT: Expected more data. Missing approximately {missing_bytes} bytes.\n")
+                                log(f"⚠️ This file appears to be CORRUPTED - some packets were not received!\n")
+                                log(f"⚠️ Please request the sender to send the file again.\n")
+                            break
+                        session.send(last_ack)  # Our ACK may have been lost
+                        in_window = 0
+                        continue
+                    silent = 0.0
+                    data_pkt, _ = reply
+                    if struct.unpack('!H', data_pkt[:2])[0] != OP_DATA:
+                        break
+                    block = struct.unpack('!H', data_pkt[2:4])[0]
+                    ahead = (block - block_num) & 0xFFFF
+
+                    if ahead:
+                        if ahead == 0xFFFF:
+                            # The block we just acknowledged, so our ACK was lost; acknowledge it again
+                            log(f"⚠️ Duplicate/out-of-order block {block}, expected {block_num & 0xFFFF}\n")
+                            session.send(ack_packet(block_num - 1))
+                            continue
+                        if ahead >= 0x8000:
+                            log(f"⚠️ Duplicate/out-of-order block {block}, expected {block_num & 0xFFFF}\n")
+                            continue
+                        if window > 1:
+                            # A block of the window was lost: acknowledge the last good one and the sender goes back to it
+                            if gap_at != block_num:
+                                gap_at = block_num
+                                log(f"⚠️ Gap before block {block}, asking for a resend from block {block_num & 0xFFFF}\n")
+                                last_ack = ack_packet(block_num - 1)
+                                session.send(last_ack)
+                                in_window = 0
+                            continue
+                        # Stop-and-wait sender skipped blocks: record them as missing and carry on
+                        for missing in range(block_num, block_num + ahead):
+                            missing_blocks.append(missing)
+                            log(f"⚠️ MISSING BLOCK {missing}! Expected {block_num}, received {block_num + ahead}\n")
+                        block_num += ahead
+
+                    filedata = data_pkt[4:]
+                    f.write(filedata)
+                    total_received += len(filedata)
+
+                    if missing_blocks:
+                        log(f"Received block {block_num} ({len(filedata)} bytes) - GAPS DETECTED\n")
+                    else:
+                        log(f"Received block {block_num}, {len(filedata)} bytes\n")
+
+                    # ACK every block, or once per window when windowsize was negotiated (RFC 7440)
+                    last_block = len(filedata) < block_size
+                    in_window += 1
+                    if in_window >= window or last_block:
+                        last_ack = ack_packet(block_num)
+                        session.send(last_ack)
+                        in_window = 0
+                    block_num += 1
+
+                    if last_block:
+                        completed = True
+                        break
+        finally:
+            self.writing.discard(out_filename)
+
+        # Final corruption check
+        if missing_blocks:
+            log(f"\n🚨 FILE CORRUPTION DETECTED! 🚨\n")
+            log(f"Missing blocks: {missing_blocks}\n")
+            log(f"Missing approximately {len(missing_blocks) * block_size} bytes of data.\n")
+            log(f"⚠️ This file is CORRUPTED and should not be used!\n")
+            log(f"⚠️ Please request the sender to resend the file.\n\n")
+
+        # Check size if expected
+        if expected_size is not None:
+            if total_received != expected_size:
+                missing_bytes = expected_size - total_received
+                log(f"🚨 SIZE MISMATCH DETECTED! 🚨\n")
+                log(f"Expected {expected_size} bytes, received {total_received} bytes\n")
+                log(f"Missing {missing_bytes} bytes - FILE IS CORRUPTED!\n")
+                log(f"⚠️ Please request the sender to send the file again.\n")
+            else:
+                if missing_blocks:
+                    log(f"File size matches expected ({total_received} bytes) but blocks are missing - FILE IS STILL CORRUPTED!\n")
+                else:
+                    log(f"File received successfully: {out_filename} ({total_received} bytes, matches expected)\n")
+        else:
+            if missing_blocks:
+                log(f"File received: {out_filename} ({total_received} bytes) - ⚠️ BUT CORRUPTED DUE TO MISSING BLOCKS!\n")
+            else:
+                log(f"File received: {out_filename} ({total_received} bytes)\n")
+
+        # Dally only after the file is closed and released, so the next WRQ can write the same path
+        if completed:
+            await self._dally(session, last_ack)
+
+    async def _dally(self, session, final_ack):
+        """Keep the transfer ID open briefly so a lost final ACK can be answered again (RFC 1350)"""
+        while await session.recv(TFTP_TIMEOUT) is not None:
+            session.send(final_ack)
+
+
+class EngineThread:
+    """An asyncio event loop on a daemon thread
+
+    Tk callbacks hand it coroutines with submit() and get a
+    concurrent.futures.Future back; cancelling that future cancels the
+    transfer at its next await.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)